@@ -14,6 +14,34 @@ from pathlib import Path
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 
+# orjson（任意）: インストール済みの場合は履歴JSONの読み書きに使用する（C実装で高速）
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _read_json(path: Path) -> Any:
+    """JSONファイル読み込み"""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_json(path: Path, data: Any):
+    """JSONファイル書き込み（インデント2・非ASCIIはそのまま、出力形式はどちらでも同じ）"""
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def _bigrams(text: str) -> set:
+    """文字2-gramの集合（検索インデックスのキー）"""
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
 
 class ChatHistoryManager:
     """チャット履歴管理クラス"""
@@ -31,6 +59,9 @@ class ChatHistoryManager:
         # セッション一覧ファイル
         self.sessions_file = self.history_dir / "sessions.json"
         self.sessions = self._load_sessions()
+        
+        # セッションID → 検索インデックス（search_messagesの初回呼び出し時に構築）
+        self._search_index: Dict[str, Dict[str, Any]] = {}
     
     def _load_sessions(self) -> Dict[str, Any]:
         """セッション一覧を読み込み"""
@@ -38,8 +69,7 @@ class ChatHistoryManager:
             return {}
         
         try:
-            with open(self.sessions_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return _read_json(self.sessions_file)
         except Exception as e:
             print(f"セッション読み込みエラー: {e}")
             return {}
@@ -47,8 +77,7 @@ class ChatHistoryManager:
     def _save_sessions(self):
         """セッション一覧を保存"""
         try:
-            with open(self.sessions_file, 'w', encoding='utf-8') as f:
-                json.dump(self.sessions, f, indent=2, ensure_ascii=False)
+            _write_json(self.sessions_file, self.sessions)
         except Exception as e:
             print(f"セッション保存エラー: {e}")
     
@@ -89,8 +118,7 @@ class ChatHistoryManager:
         }
         
         try:
-            with open(session_file, 'w', encoding='utf-8') as f:
-                json.dump(session_data, f, indent=2, ensure_ascii=False)
+            _write_json(session_file, session_data)
         except Exception as e:
             print(f"セッションファイル作成エラー: {e}")
             return None
@@ -107,6 +135,19 @@ class ChatHistoryManager:
             content: メッセージ内容
             metadata: メタデータ（モード、実行時間など）
             
+        Returns:
+            成功/失敗
+        """
+        return self.add_messages(session_id, [(role, content, metadata)])
+    
+    def add_messages(self, session_id: str, messages: List[tuple]) -> bool:
+        """
+        複数メッセージをまとめて追加（セッションファイルの読み書きは1回）
+        
+        Args:
+            session_id: セッションID
+            messages: (role, content, metadata) のリスト（metadataはNone可）
+            
         Returns:
             成功/失敗
         """
@@ -121,31 +162,36 @@ class ChatHistoryManager:
         
         try:
             # セッションデータ読み込み
-            with open(session_file, 'r', encoding='utf-8') as f:
-                session_data = json.load(f)
+            session_data = _read_json(session_file)
             
             # メッセージ追加
-            message = {
-                "role": role,
-                "content": content,
-                "timestamp": datetime.now().isoformat(),
-                "metadata": metadata or {}
-            }
-            
-            session_data["messages"].append(message)
+            new_messages = [
+                {
+                    "role": role,
+                    "content": content,
+                    "timestamp": datetime.now().isoformat(),
+                    "metadata": metadata or {}
+                }
+                for role, content, metadata in messages
+            ]
+            session_data["messages"].extend(new_messages)
             
             # セッション情報更新
             session_data["session_info"]["message_count"] = len(session_data["messages"])
             session_data["session_info"]["updated_at"] = datetime.now().isoformat()
             
             # ファイル保存
-            with open(session_file, 'w', encoding='utf-8') as f:
-                json.dump(session_data, f, indent=2, ensure_ascii=False)
+            _write_json(session_file, session_data)
             
             # セッション一覧更新
             self.sessions[session_id] = session_data["session_info"]
             self._save_sessions()
             
+            # 構築済みの検索インデックスには追加分のみ反映
+            index = self._search_index.get(session_id)
+            if index is not None:
+                self._index_messages(index, new_messages)
+            
             return True
             
         except Exception as e:
@@ -159,12 +205,71 @@ class ChatHistoryManager:
             return []
         
         try:
-            with open(session_file, 'r', encoding='utf-8') as f:
-                session_data = json.load(f)
+            session_data = _read_json(session_file)
             return session_data.get("messages", [])
         except Exception:
             return []
     
+    @staticmethod
+    def _index_messages(index: Dict[str, Any], messages: List[Dict]):
+        """メッセージを検索インデックスに追加（2-gram → メッセージ番号の昇順リスト）"""
+        postings = index["postings"]
+        for message in messages:
+            position = len(index["messages"])
+            lowered = message["content"].lower()
+            index["messages"].append(message)
+            index["lowered"].append(lowered)
+            for gram in _bigrams(lowered):
+                postings.setdefault(gram, []).append(position)
+    
+    def _get_search_index(self, session_id: str) -> Dict[str, Any]:
+        """セッションの検索インデックスを取得（初回のみセッションファイルから構築）"""
+        index = self._search_index.get(session_id)
+        if index is None:
+            index = {"messages": [], "lowered": [], "postings": {}}
+            self._index_messages(index, self.get_session_messages(session_id))
+            self._search_index[session_id] = index
+        return index
+    
+    def search_messages(self, query: str, session_id: Optional[str] = None) -> List[Dict]:
+        """
+        メッセージを検索（大文字小文字を区別しない部分一致）
+        
+        クエリの2-gramをすべて含むメッセージだけを候補とし、候補に対してのみ
+        部分一致を確認する。1文字のクエリは全メッセージを走査する。
+        
+        Args:
+            query: 検索文字列
+            session_id: 対象セッションID（省略時は全セッション）
+            
+        Returns:
+            一致したメッセージのリスト（各要素にsession_idを付加）
+        """
+        lowered_query = query.lower()
+        grams = _bigrams(lowered_query)
+        session_ids = [session_id] if session_id else list(self.sessions)
+        
+        results = []
+        for sid in session_ids:
+            if sid not in self.sessions:
+                continue
+            
+            index = self._get_search_index(sid)
+            if grams:
+                postings = [index["postings"].get(gram) for gram in grams]
+                if not all(postings):
+                    continue
+                postings.sort(key=len)
+                candidates = sorted(set(postings[0]).intersection(*postings[1:]))
+            else:
+                candidates = range(len(index["messages"]))
+            
+            for position in candidates:
+                if lowered_query in index["lowered"][position]:
+                    results.append(dict(index["messages"][position], session_id=sid))
+        
+        return results
+    
     def get_session_info(self, session_id: str) -> Optional[Dict]:
         """セッション情報を取得"""
         return self.sessions.get(session_id)
@@ -14,20 +14,161 @@ O3ProConfig, O3ProClientクラスを提供
 """
 
 import os
+import time
+import atexit
+import asyncio
+import functools
+import threading
 from pathlib import Path
 from typing import Optional
 from dotenv import load_dotenv
 
+from .rate_limiter import TokenBucket
+
+
+@functools.cache
+def _load_openai():
+    """openaiモジュールを初回のみ読み込む（以降はキャッシュを返す）"""
+    import openai
+    return openai
+
+
+@functools.cache
+def _load_azure_identity():
+    """azure.identityモジュールを初回のみ読み込む（msal等を含み読み込みが重いため遅延）"""
+    from azure import identity
+    return identity
+
+
+class _CachedTokenCredential:
+    """
+    取得済みトークンを有効期限まで再利用するTokenCredentialラッパー
+    
+    DefaultAzureCredentialはAzure CLI経由の場合、get_token毎にazプロセスを
+    起動する（約1秒）ため、スコープ単位でトークンをメモリに保持する。
+    """
+    
+    REFRESH_MARGIN_SECONDS = 300
+    
+    def __init__(self, credential):
+        self._credential = credential
+        self._tokens = {}
+        self._lock = threading.Lock()
+    
+    def get_token(self, *scopes, claims=None, tenant_id=None, **kwargs):
+        """有効期限の5分前まではキャッシュ済みトークンを返す"""
+        # claims/tenant_id指定時（CAEチャレンジ等）は常に再取得
+        if claims or tenant_id:
+            return self._credential.get_token(*scopes, claims=claims, tenant_id=tenant_id, **kwargs)
+        
+        with self._lock:
+            token = self._tokens.get(scopes)
+            if token is None or time.time() >= token.expires_on - self.REFRESH_MARGIN_SECONDS:
+                token = self._credential.get_token(*scopes, **kwargs)
+                self._tokens[scopes] = token
+            return token
+
+
+_SHARED_HTTP_CLIENT = None
+_SHARED_HTTP_CLIENT_LOCK = threading.Lock()
+
+
+def _http_client_options() -> dict:
+    """
+    同期・非同期のhttpxクライアントに共通の接続プール設定
+    
+    keepalive_expiryを既定の5秒から延ばし、ユーザーの入力待ちを挟んでも
+    TLS接続を再利用できるようにする。
+    """
+    import httpx
+    
+    return {
+        "limits": httpx.Limits(
+            max_connections=20,
+            max_keepalive_connections=10,
+            keepalive_expiry=60.0
+        ),
+        "timeout": httpx.Timeout(600.0, connect=10.0)
+    }
+
+
+def _get_shared_http_client():
+    """
+    プロセス内で共有するhttpx.Clientを取得
+    
+    O3ProClientを複数生成してもTCP/TLS接続をプールから再利用できるようにする。
+    プロセス終了時にatexitで接続を閉じる。
+    """
+    global _SHARED_HTTP_CLIENT
+    with _SHARED_HTTP_CLIENT_LOCK:
+        if _SHARED_HTTP_CLIENT is None:
+            import httpx
+            
+            _SHARED_HTTP_CLIENT = httpx.Client(**_http_client_options())
+            atexit.register(_SHARED_HTTP_CLIENT.close)
+        return _SHARED_HTTP_CLIENT
+
+
+_SHARED_CREDENTIAL: Optional[_CachedTokenCredential] = None
+_SHARED_CREDENTIAL_LOCK = threading.Lock()
+
+
+def _get_shared_credential() -> _CachedTokenCredential:
+    """プロセス内で共有するトークンキャッシュ付きDefaultAzureCredentialを取得"""
+    global _SHARED_CREDENTIAL
+    with _SHARED_CREDENTIAL_LOCK:
+        if _SHARED_CREDENTIAL is None:
+            _SHARED_CREDENTIAL = _CachedTokenCredential(
+                _load_azure_identity().DefaultAzureCredential()
+            )
+        return _SHARED_CREDENTIAL
+
+
+@functools.cache
+def _load_env(env_path: Optional[str]):
+    """
+    .envを読み込む（同じパスは初回のみ解析する）
+    
+    O3ProConfigを複数回生成してもファイルの再読み込み・再解析を行わない。
+    """
+    if env_path:
+        load_dotenv(env_path, override=True)
+    else:
+        load_dotenv(override=True)
+
+
+def _positive_env(name: str, default, parse=int):
+    """
+    正の数値の環境変数を読み込む
+    
+    未設定・数値でない・0以下の場合は警告を表示して既定値を使う。
+    
+    Args:
+        name: 環境変数名
+        default: 既定値
+        parse: 値の変換関数（int または float）
+    """
+    value = os.getenv(name)
+    if value is None:
+        return default
+    
+    try:
+        parsed = parse(value)
+    except ValueError:
+        parsed = 0
+    
+    if not parsed > 0:  # NaNも既定値にする
+        print(f"WARN {name}={value!r} は正の数値ではないため、既定値 {default} を使用します")
+        return default
+    return parsed
+
 
 class O3ProConfig:
     """o3-pro設定管理クラス（動作確認済み）"""
     
     def __init__(self, env_path: Optional[str] = None):
         """設定を初期化"""
-        if env_path:
-            load_dotenv(env_path, override=True)
-        else:
-            load_dotenv(override=True)
+        _load_env(env_path)
         
         self.api_key = os.getenv("AZURE_OPENAI_API_KEY")
         self.endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
@@ -36,6 +177,11 @@ class O3ProConfig:
         self.client_id = os.getenv("AZURE_CLIENT_ID")
         self.client_secret = os.getenv("AZURE_CLIENT_SECRET")
         self.tenant_id = os.getenv("AZURE_TENANT_ID")
+        self.rate_limit_enabled = os.getenv("API_RATE_LIMIT_ENABLED", "false").lower() == "true"
+        self.rpm = _positive_env("API_MAX_REQUESTS_PER_MINUTE", 60)
+        self.response_cache_enabled = os.getenv("O3_RESPONSE_CACHE", "false").lower() == "true"
+        self.response_cache_path = os.getenv("O3_RESPONSE_CACHE_PATH", ".o3_cache.sqlite")
+        self.response_cache_ttl = _positive_env("O3_RESPONSE_CACHE_TTL", 86400.0, float)
     
     def validate(self) -> bool:
         """設定の妥当性をチェック（デバッグ済み）"""
@@ -66,23 +212,36 @@ class O3ProConfig:
 class O3ProClient:
     """o3-pro専用クライアントクラス（動作確認済み）"""
     
-    def __init__(self, config: O3ProConfig, auth_method: str = "auto"):
+    MAX_RATE_LIMIT_RETRIES = 5
+    MAX_RETRY_AFTER_SECONDS = 60.0  # Retry-Afterに従って待機する上限
+    
+    def __init__(self, config: O3ProConfig, auth_method: str = "auto", http_client=None):
         """
         クライアント初期化
         
         Args:
             config: 設定オブジェクト
             auth_method: 認証方法 ("api_key", "azure_ad", "auto")
+            http_client: 使用するhttpx.Client（省略時はプロセス内共有のクライアント）
         """
         self.config = config
         self.client = None
         self.auth_method = auth_method
+        self.http_client = http_client
+        self._token_provider = None
+        self._async_client = None
+        self._limiter = (
+            TokenBucket(rate=config.rpm / 60, burst=config.rpm / 6)
+            if config.rate_limit_enabled else None
+        )
         self._initialize_client()
     
     def _initialize_client(self):
         """クライアントを初期化（デバッグ済み）"""
         try:
-            from openai import AzureOpenAI
+            AzureOpenAI = _load_openai().AzureOpenAI
+            if self.http_client is None:
+                self.http_client = _get_shared_http_client()
             
             if self.auth_method == "api_key" or (
                 self.auth_method == "auto" and self.config.api_key
@@ -91,7 +250,8 @@ class O3ProClient:
                 self.client = AzureOpenAI(
                     api_key=self.config.api_key,
                     azure_endpoint=self.config.endpoint,
-                    api_version=self.config.api_version
+                    api_version=self.config.api_version,
+                    http_client=self.http_client
                 )
                 print("OK API Key認証成功")
                 
@@ -99,17 +259,19 @@ class O3ProClient:
                 self.auth_method == "auto" and self.config.has_azure_ad_config()
             ):
                 print("Azure AD認証でクライアント初期化中...")
-                from azure.identity import DefaultAzureCredential, get_bearer_token_provider
+                identity = _load_azure_identity()
                 
-                token_provider = get_bearer_token_provider(
-                    DefaultAzureCredential(),
+                token_provider = identity.get_bearer_token_provider(
+                    _get_shared_credential(),
                     "https://cognitiveservices.azure.com/.default"
                 )
+                self._token_provider = token_provider
                 
                 self.client = AzureOpenAI(
                     azure_endpoint=self.config.endpoint,
                     azure_ad_token_provider=token_provider,
-                    api_version=self.config.api_version
+                    api_version=self.config.api_version,
+                    http_client=self.http_client
                 )
                 print("OK Azure AD認証成功")
                 
@@ -124,6 +286,134 @@ class O3ProClient:
         """クライアントが使用可能かチェック"""
         return self.client is not None
     
+    @classmethod
+    def _retry_delay(cls, error, attempt: int) -> float:
+        """
+        429応答の待機秒数
+        
+        サーバーが retry-after-ms / Retry-After（秒）を返した場合はその値に従い
+        （上限 MAX_RETRY_AFTER_SECONDS）、無い・解釈できない場合は指数バックオフにする。
+        """
+        backoff = float(2 ** attempt)
+        response = getattr(error, "response", None)
+        headers = response.headers if response is not None else {}
+        
+        for header, scale in (("retry-after-ms", 1000.0), ("retry-after", 1.0)):
+            value = headers.get(header)
+            if not value:
+                continue
+            try:
+                retry_after = float(value) / scale
+            except ValueError:
+                continue  # HTTP日付形式などは扱わずバックオフにする
+            if retry_after > 0:
+                return min(retry_after, cls.MAX_RETRY_AFTER_SECONDS)
+        
+        return backoff
+    
+    def create_response(self, **kwargs):
+        """
+        レート制限とリトライ付きで responses.create を呼び出す
+        
+        RateLimitError(429) のみ最大 MAX_RATE_LIMIT_RETRIES 回まで再試行し、
+        それ以外の例外はそのまま送出する。リトライはこのメソッドだけで行うため、
+        SDK側の自動リトライ（max_retries）は無効にして呼び出す。
+        
+        Args:
+            **kwargs: responses.create に渡すパラメータ
+            
+        Returns:
+            APIレスポンス（stream=True の場合はストリーム）
+        """
+        RateLimitError = _load_openai().RateLimitError
+        client = self.client.with_options(max_retries=0)
+        
+        for attempt in range(self.MAX_RATE_LIMIT_RETRIES):
+            if self._limiter is not None:
+                self._limiter.acquire()
+            try:
+                return client.responses.create(**kwargs)
+            except RateLimitError as e:
+                if attempt == self.MAX_RATE_LIMIT_RETRIES - 1:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                print(f"WARN レート制限（429）、{delay:.1f}秒後にリトライします...")
+                time.sleep(delay)
+    
+    async def acreate_response(self, async_client, **kwargs):
+        """
+        create_response の非同期版
+        
+        Args:
+            async_client: 使用するAsyncAzureOpenAIインスタンス
+            **kwargs: responses.create に渡すパラメータ
+            
+        Returns:
+            APIレスポンス
+        """
+        RateLimitError = _load_openai().RateLimitError
+        async_client = async_client.with_options(max_retries=0)
+        
+        for attempt in range(self.MAX_RATE_LIMIT_RETRIES):
+            if self._limiter is not None:
+                await self._limiter.acquire_async()
+            try:
+                return await async_client.responses.create(**kwargs)
+            except RateLimitError as e:
+                if attempt == self.MAX_RATE_LIMIT_RETRIES - 1:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                print(f"WARN レート制限（429）、{delay:.1f}秒後にリトライします...")
+                await asyncio.sleep(delay)
+    
+    def create_async_client(self):
+        """
+        同期クライアントと同じ認証方式で新しいAsyncAzureOpenAIを生成
+        
+        呼び出し側のイベントループ内でのみ使用し、終了時にclose()すること。
+        
+        Returns:
+            AsyncAzureOpenAIインスタンス（同期クライアント未初期化時はNone）
+        """
+        if not self.is_ready():
+            return None
+        
+        import httpx
+        
+        AsyncAzureOpenAI = _load_openai().AsyncAzureOpenAI
+        # close()時にAsyncAzureOpenAIと一緒に閉じられる
+        http_client = httpx.AsyncClient(**_http_client_options())
+        
+        if self._token_provider is not None:
+            return AsyncAzureOpenAI(
+                azure_endpoint=self.config.endpoint,
+                azure_ad_token_provider=self._token_provider,
+                api_version=self.config.api_version,
+                http_client=http_client
+            )
+        
+        return AsyncAzureOpenAI(
+            api_key=self.config.api_key,
+            azure_endpoint=self.config.endpoint,
+            api_version=self.config.api_version,
+            http_client=http_client
+        )
+    
+    def get_async_client(self):
+        """
+        共有の非同期クライアントを取得（初回のみ生成し、以降は再利用）
+        
+        内部のhttpx接続プールは並行リクエスト間で共有されるため、
+        長期間動作する単一のイベントループから使用すること。
+        
+        Returns:
+            AsyncAzureOpenAIインスタンス（同期クライアント未初期化時はNone）
+        """
+        if self._async_client is None:
+            self._async_client = self.create_async_client()
+        
+        return self._async_client
+    
     def test_connection(self) -> bool:
         """接続テスト（デバッグ済み）"""
         if not self.is_ready():
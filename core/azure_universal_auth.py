@@ -14,6 +14,7 @@ Azure汎用認証基盤 - Universal Azure Authentication Framework
 import os
 import time
 import json
+import threading
 from abc import ABC, abstractmethod
 from typing import Dict, List, Optional, Tuple, Any, Union
 from dataclasses import dataclass
@@ -45,6 +46,7 @@ class AuthResult:
     user_info: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
     expires_at: Optional[datetime] = None
+    token: Optional[Any] = None  # 認証時に取得したAccessToken
 
 
 @dataclass 
@@ -135,7 +137,21 @@ class CredentialProvider(ABC):
     
     def __init__(self, name: str):
         self.name = name
-        self.last_error: Optional[str] = None
+        self._local = threading.local()
+    
+    @property
+    def last_error(self) -> Optional[str]:
+        """
+        このスレッドで最後に発生したエラー
+        
+        AzureAuthManagerのプロバイダーは複数スレッドの認証で共有されるため、
+        他スレッドのエラーが別サービスの認証結果に混ざらないようスレッドごとに保持する。
+        """
+        return getattr(self._local, "last_error", None)
+    
+    @last_error.setter
+    def last_error(self, value: Optional[str]):
+        self._local.last_error = value
     
     @abstractmethod
     def create_credential(self, **kwargs) -> Optional[TokenCredential]:
@@ -155,6 +171,20 @@ class CredentialProvider(ABC):
     def get_priority(self) -> int:
         """認証プロバイダーの優先度（低い値が高優先度）"""
         return 100
+    
+    def acquire_token(self, credential: TokenCredential, scope: str) -> Optional[Any]:
+        """
+        トークンを取得して検証（validate_credentialと同じ判定で、取得したトークンを返す）
+        
+        Returns:
+            AccessToken（失敗時はNone、エラーはlast_errorに記録）
+        """
+        try:
+            token = credential.get_token(scope)
+        except Exception as e:
+            self.last_error = f"認証検証失敗: {e}"
+            return None
+        return token if token is not None and token.token else None
 
 
 class CliCredentialProvider(CredentialProvider):
@@ -367,6 +397,9 @@ class TokenCacheManager:
 class AzureAuthManager:
     """Azure汎用認証管理クラス"""
     
+    # 有効期限までの残りがこの秒数を切ったトークンは再取得する
+    TOKEN_REFRESH_MARGIN_SECONDS = 300
+    
     def __init__(self, 
                  cache_enabled: bool = True,
                  prefer_cli: bool = True,
@@ -395,6 +428,12 @@ class AzureAuthManager:
         
         # 現在の認証状態
         self.current_auth: Optional[AuthResult] = None
+        
+        # スコープ → 取得済みAccessToken（Azure CLI経由ではget_token毎にazプロセスが起動するため）
+        self._token_cache: Dict[str, Any] = {}
+        
+        # current_authとトークンキャッシュの更新を保護（複数スレッドから並行して認証できるように）
+        self._lock = threading.Lock()
     
     def authenticate(self, 
                     service: str = "cognitive_services",
@@ -448,7 +487,8 @@ class AzureAuthManager:
             result = self._try_authenticate(provider, scope, **kwargs)
             
             if result.success:
-                self.current_auth = result
+                with self._lock:
+                    self.current_auth = result
                 return result
             
             last_error = result.error or f"{provider.name}認証失敗"
@@ -474,14 +514,18 @@ class AzureAuthManager:
                     error=provider.last_error or "クレデンシャル作成失敗"
                 )
             
-            # 認証検証
-            if not provider.validate_credential(credential, scope):
+            # 認証検証（取得したトークンは直後のget_tokenで再利用する）
+            token = provider.acquire_token(credential, scope)
+            if token is None:
                 return AuthResult(
                     success=False,
                     method=provider.name,
                     error=provider.last_error or "認証検証失敗"
                 )
             
+            with self._lock:
+                self._token_cache[scope] = token
+            
             # ユーザー情報取得（可能な場合）
             user_info = self._get_user_info(credential)
             
@@ -491,7 +535,8 @@ class AzureAuthManager:
                 credential=credential,
                 method=provider.name,
                 user_info=user_info,
-                expires_at=datetime.now() + timedelta(hours=1)  # 概算有効期限
+                expires_at=datetime.now() + timedelta(hours=1),  # 概算有効期限
+                token=token
             )
             
         except Exception as e:
@@ -509,6 +554,9 @@ class AzureAuthManager:
             token = credential.get_token(graph_scope)
             
             if token:
+                with self._lock:
+                    self._token_cache[graph_scope] = token
+                
                 # 実際のGraph API呼び出しは省略（必要に応じて実装）
                 return {
                     "authenticated": True,
@@ -523,21 +571,33 @@ class AzureAuthManager:
     def get_token(self, service: str = "cognitive_services") -> Optional[str]:
         """指定サービス用のアクセストークンを取得"""
         
-        if not self.current_auth or not self.current_auth.success:
-            auth_result = self.authenticate(service)
-            if not auth_result.success:
+        current_auth = self.current_auth
+        if not current_auth or not current_auth.success:
+            current_auth = self.authenticate(service)
+            if not current_auth.success:
                 return None
         
         scope = AzureServiceScopeRegistry.get_default_scope(service)
         if not scope:
             return None
         
+        with self._lock:
+            token = self._token_cache.get(scope)
+            if token is not None and token.expires_on - time.time() > self.TOKEN_REFRESH_MARGIN_SECONDS:
+                return token.token
+        
         try:
-            token = self.current_auth.credential.get_token(scope)
-            return token.token if token else None
+            token = current_auth.credential.get_token(scope)
         except Exception as e:
             print(f"WARN: トークン取得失敗: {e}")
             return None
+        
+        if not token:
+            return None
+        
+        with self._lock:
+            self._token_cache[scope] = token
+        return token.token
     
     def is_authenticated(self) -> bool:
         """認証状態をチェック"""
@@ -560,7 +620,9 @@ class AzureAuthManager:
     
     def clear_auth(self):
         """認証状態をクリア"""
-        self.current_auth = None
+        with self._lock:
+            self.current_auth = None
+            self._token_cache.clear()
         if self.cache_manager:
             self.cache_manager.clear_cache()
     
@@ -0,0 +1,64 @@
+"""
+レート制限モジュール
+
+Azure OpenAIのRPM上限を超えないよう、送信側でリクエストを平準化する
+トークンバケット方式のレートリミッター
+
+使用方法:
+    from core.rate_limiter import TokenBucket
+
+    limiter = TokenBucket(rate=1.0, burst=10)  # 1リクエスト/秒、最大10バースト
+    limiter.acquire()          # 同期コード
+    await limiter.acquire_async()  # 非同期コード
+
+作成日: 2025-07-19
+"""
+
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """スレッドセーフなトークンバケット"""
+
+    def __init__(self, rate: float, burst: float):
+        """
+        レートリミッター初期化
+
+        Args:
+            rate: 1秒あたりに補充されるトークン数
+            burst: バケットの最大容量（連続送信できる最大数）
+        """
+        if rate <= 0:
+            raise ValueError("rate は正の値である必要があります")
+
+        self.rate = rate
+        self.capacity = max(1.0, burst)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """トークンを1つ予約し、使用可能になるまでの待機秒数を返す"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """トークンを取得（必要なら待機）"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """トークンを取得（イベントループをブロックせずに待機）"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
@@ -0,0 +1,87 @@
+"""
+推論結果ディスクキャッシュモジュール
+
+同一の (デプロイメント, 推論レベル, 入力) に対する推論結果をSQLiteに保存し、
+プロセス再起動後も再利用できるようにする（開発時の繰り返し実行向け）
+
+使用方法:
+    from core.response_cache import DiskCache
+
+    cache = DiskCache(".o3_cache.sqlite")
+    key = DiskCache.make_key("O3-pro", "low", "質問")
+    cached = cache.get(key, ttl=86400)
+    if cached is None:
+        cache.put(key, {"response": "..."})
+
+作成日: 2025-07-19
+"""
+
+import json
+import sqlite3
+import hashlib
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class DiskCache:
+    """SQLiteベースの完全一致キャッシュ"""
+
+    def __init__(self, path: str = ".o3_cache.sqlite"):
+        """
+        キャッシュ初期化
+
+        Args:
+            path: SQLiteファイルのパス
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS r(k TEXT PRIMARY KEY, v BLOB, ts REAL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(deployment: str, effort: str, *inputs: str) -> str:
+        """キャッシュキーを生成（入力はSHA-256でハッシュ化）"""
+        digest = hashlib.sha256()
+        for text in inputs:
+            digest.update(text.encode("utf-8"))
+            digest.update(b"\0")
+        return f"{deployment}:{effort}:{digest.hexdigest()}"
+
+    def get(self, key: str, ttl: float) -> Optional[Dict[str, Any]]:
+        """
+        キャッシュを取得
+
+        Args:
+            key: キャッシュキー
+            ttl: 有効期間（秒）
+
+        Returns:
+            保存された辞書（未登録・期限切れの場合はNone）
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT v, ts FROM r WHERE k = ?", (key,)
+            ).fetchone()
+
+        if row is None or time.time() - row[1] >= ttl:
+            return None
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """キャッシュを保存（既存キーは上書き）"""
+        blob = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO r(k, v, ts) VALUES (?, ?, ?)",
+                (key, blob, time.time())
+            )
+            self._conn.commit()
+
+    def close(self):
+        """接続を閉じる"""
+        with self._lock:
+            self._conn.close()
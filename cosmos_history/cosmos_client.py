@@ -283,6 +283,26 @@ class CosmosDBClient:
             len(self.containers) >= 2
         )
     
+    def close(self):
+        """
+        クライアントを閉じ、HTTP接続プールを解放（以降は使用不可）
+        
+        接続プールはクライアントの生存期間中は再利用されるため、
+        アプリケーション終了時に1回だけ呼び出す
+        """
+        if self.client is None:
+            return
+        
+        try:
+            # 同期版CosmosClientはコンテキストマネージャーの終了処理で接続を解放する
+            self.client.__exit__(None, None, None)
+        except Exception as e:
+            logger.warning(f"Cosmos DB client close failed: {e}")
+        finally:
+            self.client = None
+            self.database = None
+            self.containers = {}
+    
     def health_check(self) -> Dict[str, Any]:
         """ヘルスチェック"""
         try:
@@ -22,6 +22,9 @@ logger = logging.getLogger(__name__)
 class CosmosHistoryManager:
     """Cosmos DB チャット履歴管理メインクラス"""
     
+    # トランザクショナルバッチ1回あたりの最大操作数（Cosmos DBの上限）
+    MAX_BATCH_OPERATIONS = 100
+    
     def __init__(self, cosmos_client: CosmosDBClient, tenant_id: str, config: 'AppConfig' = None):
         """
         初期化
@@ -246,6 +249,105 @@ class CosmosHistoryManager:
             logger.error(f"Failed to add message: {e}")
             raise
     
+    async def add_messages(
+        self,
+        conversation_id: str,
+        messages: List[Dict[str, Any]]
+    ) -> List[ChatMessage]:
+        """
+        同一会話へのメッセージ一括追加
+        
+        会話取得・シーケンス番号採番・会話更新を1回にまとめ、メッセージ作成は
+        トランザクショナルバッチ（同一パーティション）で送信する
+        
+        Args:
+            conversation_id: 会話ID
+            messages: add_message と同じキー（sender_user_id, sender_display_name,
+                      content, sender_role, metadata）を持つ辞書のリスト（追加順）
+        """
+        
+        if not messages:
+            return []
+        
+        # 会話存在確認
+        conversation = await self.get_conversation(conversation_id)
+        if not conversation:
+            logger.error(f"Failed to add messages: conversation not found: {conversation_id}")
+            raise ValueError(f"会話が見つかりません: {conversation_id}")
+        
+        return await self.add_messages_to(conversation, messages)
+    
+    async def add_messages_to(
+        self,
+        conversation: ChatConversation,
+        messages: List[Dict[str, Any]]
+    ) -> List[ChatMessage]:
+        """
+        取得済みの会話オブジェクトへのメッセージ一括追加（会話の再取得を省く）
+        
+        会話オブジェクトのメトリクス等はその場で更新されるため、呼び出し側で
+        保持し続けて次回以降も渡すことができる
+        
+        Args:
+            conversation: 追加先の会話
+            messages: add_messages と同じ形式の辞書のリスト（追加順）
+        """
+        
+        if not messages:
+            return []
+        
+        conversation_id = conversation.conversation_id
+        
+        try:
+            # シーケンス番号は先頭だけ取得し、以降は連番で採番
+            first_sequence = await self._get_next_sequence_number(conversation_id)
+            
+            # TTL設定（環境変数ベース）
+            development_mode = self.config.development.development_mode
+            ttl_value = self.config.chat_history.get_message_ttl(development_mode)
+            
+            new_messages = []
+            operations = []
+            for offset, item in enumerate(messages):
+                message = ChatMessage.create_new(
+                    conversation_id=conversation_id,
+                    tenant_id=self.tenant_id,
+                    sender_user_id=item["sender_user_id"],
+                    sender_display_name=item["sender_display_name"],
+                    content_text=item["content"],
+                    sender_role=item.get("sender_role", "user"),
+                    sequence_number=first_sequence + offset,
+                    metadata=item.get("metadata") or {}
+                )
+                cosmos_dict = message.to_cosmos_dict()
+                cosmos_dict['ttl'] = ttl_value
+                new_messages.append(message)
+                operations.append(("create", (cosmos_dict,)))
+            
+            # Cosmos DBに保存（トランザクショナルバッチは1回あたり最大100操作）
+            created_messages = []
+            for start in range(0, len(operations), self.MAX_BATCH_OPERATIONS):
+                results = self.messages_container.execute_item_batch(
+                    batch_operations=operations[start:start + self.MAX_BATCH_OPERATIONS],
+                    partition_key=conversation_id
+                )
+                for (_, (cosmos_dict,)), result in zip(operations[start:], results):
+                    created_messages.append(
+                        ChatMessage.from_cosmos_dict(result.get("resourceBody") or cosmos_dict)
+                    )
+            
+            # 会話情報更新（1回のみ）
+            await self._update_conversation_from_messages(
+                conversation, new_messages, is_first_message=(first_sequence == 1)
+            )
+            
+            logger.info(f"Messages added: {len(created_messages)} to {conversation_id}")
+            return created_messages
+            
+        except Exception as e:
+            logger.error(f"Failed to add messages: {e}")
+            raise
+    
     async def get_conversation_messages(
         self,
         conversation_id: str,
@@ -285,6 +387,38 @@ class CosmosHistoryManager:
             logger.error(f"Failed to get messages for conversation {conversation_id}: {e}")
             raise
     
+    async def get_recent_messages(self, conversation_id: str, count: int = 5) -> List[ChatMessage]:
+        """
+        会話内の最新メッセージ取得（古い順で返す）
+        
+        サーバー側でLIMITを適用し、会話の長さに関係なく最新count件だけを転送する
+        """
+        
+        try:
+            query = """
+                SELECT * FROM m 
+                WHERE m.conversationId = @conversationId 
+                ORDER BY m.sequenceNumber DESC
+                OFFSET 0 LIMIT @count
+            """
+            
+            parameters = [
+                {"name": "@conversationId", "value": conversation_id},
+                {"name": "@count", "value": count}
+            ]
+            
+            items = list(self.messages_container.query_items(
+                query=query,
+                parameters=parameters,
+                partition_key=conversation_id
+            ))
+            
+            return [ChatMessage.from_cosmos_dict(item) for item in reversed(items)]
+            
+        except Exception as e:
+            logger.error(f"Failed to get recent messages for conversation {conversation_id}: {e}")
+            raise
+    
     async def get_message(self, message_id: str, conversation_id: str) -> Optional[ChatMessage]:
         """個別メッセージ取得"""
         
@@ -376,21 +510,31 @@ class CosmosHistoryManager:
         is_first_message: bool = False
     ):
         """メッセージから会話情報を更新"""
+        await self._update_conversation_from_messages(conversation, [message], is_first_message)
+    
+    async def _update_conversation_from_messages(
+        self,
+        conversation: ChatConversation,
+        messages: List[ChatMessage],
+        is_first_message: bool = False
+    ):
+        """複数メッセージから会話情報を更新（会話の書き込みは1回）"""
         
         try:
-            # メッセージカウント更新
-            conversation.metrics.message_count += 1
-            
-            # タイムライン更新
-            conversation.update_from_message(message.content.text, is_first_message)
-            
-            # 参加者追加（新規の場合）
-            if not conversation.is_participant(message.sender.user_id):
-                conversation.add_participant(
-                    message.sender.user_id,
-                    message.sender.display_name,
-                    message.sender.role
-                )
+            for index, message in enumerate(messages):
+                # メッセージカウント更新
+                conversation.metrics.message_count += 1
+                
+                # タイムライン更新
+                conversation.update_from_message(message.content.text, is_first_message and index == 0)
+                
+                # 参加者追加（新規の場合）
+                if not conversation.is_participant(message.sender.user_id):
+                    conversation.add_participant(
+                        message.sender.user_id,
+                        message.sender.display_name,
+                        message.sender.role
+                    )
             
             # 会話更新
             await self.update_conversation(conversation)
@@ -425,11 +569,10 @@ class CosmosHistoryManager:
             
             # メッセージ分析
             if messages:
-                user_messages = [m for m in messages if m.sender.role == "user"]
                 assistant_messages = [m for m in messages if m.sender.role == "assistant"]
                 
                 stats.update({
-                    "user_message_count": len(user_messages),
+                    "user_message_count": sum(1 for m in messages if m.sender.role == "user"),
                     "assistant_message_count": len(assistant_messages),
                     "avg_message_length": sum(len(m.content.text) for m in messages) / len(messages),
                     "total_tokens": sum(m.metadata.tokens for m in messages if m.metadata.tokens > 0),
@@ -449,11 +592,18 @@ class CosmosHistoryManager:
             # 会話統計
             conversations = await self.list_conversations(limit=1000)
             
+            # アクティブ・アーカイブ件数は1回の走査で数える（中間リストを作らない）
+            active_count = 0
+            archived_count = 0
+            for conv in conversations:
+                active_count += conv.status == "active"
+                archived_count += bool(conv.archived)
+            
             stats = {
                 "tenant_id": self.tenant_id,
                 "total_conversations": len(conversations),
-                "active_conversations": len([c for c in conversations if c.status == "active"]),
-                "archived_conversations": len([c for c in conversations if c.archived]),
+                "active_conversations": active_count,
+                "archived_conversations": archived_count,
             }
             
             if conversations:
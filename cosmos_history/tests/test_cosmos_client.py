@@ -129,6 +129,24 @@ class TestCosmosDBClient:
             mock_auth_manager.authenticate.assert_called_once_with("cosmos_db")
             mock_cosmos_client.assert_called_once()
     
+    @patch('cosmos_history.cosmos_client.CosmosClient')
+    def test_client_close(self, mock_cosmos_client):
+        """クライアント終了テスト（接続解放・二重呼び出し可）"""
+        with patch.dict(os.environ, {
+            'COSMOS_DB_ENDPOINT': 'https://test.documents.azure.com:443/',
+            'COSMOS_DB_API_KEY': 'test_key'
+        }):
+            mock_client_instance = MagicMock()
+            mock_cosmos_client.return_value = mock_client_instance
+            
+            client = CosmosDBClient()
+            client.close()
+            client.close()
+            
+            # 検証
+            mock_client_instance.__exit__.assert_called_once()
+            assert client.is_ready() is False
+    
     def test_client_initialization_invalid_config(self):
         """無効な設定でのクライアント初期化テスト"""
         with patch.dict(os.environ, {}, clear=True):
@@ -271,6 +271,39 @@ class TestCosmosHistoryManager:
                 content="テストメッセージ"
             )
     
+    @pytest.mark.asyncio
+    async def test_add_messages_batch(self):
+        """メッセージ一括追加テスト（バッチ1回・会話更新1回）"""
+        conversation_data = {
+            "id": "conv_test123",
+            "conversationId": "test123",
+            "tenantId": "test_tenant",
+            "title": "テスト会話"
+        }
+        self.mock_conversations_container.read_item.return_value = conversation_data
+        self.mock_messages_container.query_items.return_value = [2]  # MAX結果
+        self.mock_messages_container.execute_item_batch.side_effect = (
+            lambda batch_operations, partition_key: [
+                {"statusCode": 201, "resourceBody": args[0]} for _, args in batch_operations
+            ]
+        )
+        self.mock_conversations_container.replace_item.return_value = conversation_data
+        
+        messages = await self.manager.add_messages(
+            conversation_id="test123",
+            messages=[
+                {"sender_user_id": "user1", "sender_display_name": "ユーザー", "content": "質問"},
+                {"sender_user_id": "assistant", "sender_display_name": "o3-pro", "content": "回答"}
+            ]
+        )
+        
+        # 検証
+        assert [msg.content.text for msg in messages] == ["質問", "回答"]
+        assert [msg.sequence_number for msg in messages] == [3, 4]
+        self.mock_messages_container.execute_item_batch.assert_called_once()
+        self.mock_messages_container.create_item.assert_not_called()
+        self.mock_conversations_container.read_item.assert_called_once()
+    
     @pytest.mark.asyncio
     async def test_get_conversation_messages(self):
         """会話内メッセージ一覧取得テスト"""
@@ -289,6 +322,50 @@ class TestCosmosHistoryManager:
         assert all(isinstance(msg, ChatMessage) for msg in messages)
         self.mock_messages_container.query_items.assert_called_once()
     
+    @pytest.mark.asyncio
+    async def test_add_messages_to_skips_conversation_lookup(self):
+        """取得済み会話へのメッセージ一括追加テスト（会話の再取得なし）"""
+        conversation = ChatConversation.from_cosmos_dict({
+            "id": "conv_test123",
+            "conversationId": "test123",
+            "tenantId": "test_tenant",
+            "title": "テスト会話"
+        })
+        self.mock_messages_container.query_items.return_value = [None]  # メッセージなし
+        self.mock_messages_container.execute_item_batch.side_effect = (
+            lambda batch_operations, partition_key: [
+                {"statusCode": 201, "resourceBody": args[0]} for _, args in batch_operations
+            ]
+        )
+        
+        messages = await self.manager.add_messages_to(
+            conversation,
+            [{"sender_user_id": "user1", "sender_display_name": "ユーザー", "content": "質問"}]
+        )
+        
+        # 検証
+        assert [msg.sequence_number for msg in messages] == [1]
+        self.mock_conversations_container.read_item.assert_not_called()
+        self.mock_messages_container.execute_item_batch.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_get_recent_messages(self):
+        """最新メッセージ取得テスト（サーバー側LIMIT・古い順で返却）"""
+        # モック設定（DESC順で返る）
+        mock_messages = [
+            {"id": "msg_3", "conversationId": "test123", "content": {"text": "メッセージ3"}},
+            {"id": "msg_2", "conversationId": "test123", "content": {"text": "メッセージ2"}}
+        ]
+        self.mock_messages_container.query_items.return_value = mock_messages
+        
+        messages = await self.manager.get_recent_messages("test123", count=2)
+        
+        # 検証
+        assert [msg.id for msg in messages] == ["msg_2", "msg_3"]
+        call_kwargs = self.mock_messages_container.query_items.call_args.kwargs
+        assert "LIMIT @count" in call_kwargs["query"]
+        assert {"name": "@count", "value": 2} in call_kwargs["parameters"]
+    
     @pytest.mark.asyncio
     async def test_get_message_found(self):
         """個別メッセージ取得テスト（存在する場合）"""
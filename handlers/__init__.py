@@ -3,12 +3,16 @@ o3-proツールキット ハンドラーモジュール
 
 3つの処理モード対応ハンドラーを提供:
 - ReasoningHandler: 基本推論処理（low/medium/high）
+- AsyncReasoningHandler: 非同期推論処理（推論レベルの並行実行）
 - StreamingHandler: ストリーミング応答処理
 - BackgroundHandler: バックグラウンド処理
 """
 
-from .reasoning_handler import ReasoningHandler
+from .reasoning_handler import ReasoningHandler, AsyncReasoningHandler, ReasoningResult
 from .streaming_handler import StreamingHandler
 from .background_handler import BackgroundHandler
 
-__all__ = ["ReasoningHandler", "StreamingHandler", "BackgroundHandler"]
\ No newline at end of file
+__all__ = [
+    "ReasoningHandler", "AsyncReasoningHandler", "ReasoningResult",
+    "StreamingHandler", "BackgroundHandler"
+]
\ No newline at end of file
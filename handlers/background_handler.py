@@ -30,6 +30,13 @@ from typing import Dict, Any, Optional, List
 from core.azure_auth import O3ProClient
 
 
+def _as_dict(value: Any) -> Any:
+    """SDKのモデル（pydantic）を取得時に1回だけ素のdictへ変換する（それ以外はそのまま）"""
+    if value is not None and hasattr(value, "model_dump"):
+        return value.model_dump()
+    return value
+
+
 class BackgroundHandler:
     """バックグラウンド処理ハンドラークラス"""
     
@@ -80,7 +87,7 @@ class BackgroundHandler:
                 request_params["max_completion_tokens"] = max_completion_tokens
             
             start_time = time.time()
-            response = self.client.client.responses.create(**request_params)
+            response = self.client.create_response(**request_params)
             
             # ジョブ情報を保存
             job_info = {
@@ -208,9 +215,12 @@ class BackgroundHandler:
                 "status": "completed"
             }
             
-            # 推論情報があれば追加
+            # 使用量・推論情報があれば追加（JSON保存時に変換不要な素のdictで保持）
+            usage = getattr(result_response, 'usage', None)
+            if usage is not None:
+                result["usage"] = _as_dict(usage)
             if hasattr(result_response, 'reasoning'):
-                result["reasoning"] = result_response.reasoning
+                result["reasoning"] = _as_dict(result_response.reasoning)
             
             return result
             
@@ -225,27 +235,33 @@ class BackgroundHandler:
     async def wait_for_completion(
         self, 
         job_id: str, 
-        polling_interval: float = 10.0,
-        timeout: float = 300.0
+        polling_interval: float = 3.0,
+        timeout: float = 300.0,
+        initial_interval: float = 0.1
     ) -> Dict[str, Any]:
         """
         ジョブ完了まで待機（非同期）
         
+        ポーリング間隔はinitial_intervalから倍々に延ばし、polling_intervalで頭打ちにする
+        （短いジョブは早く検知し、長いジョブではAPI呼び出し回数を抑える）。
+        
         Args:
             job_id: ジョブID
-            polling_interval: ポーリング間隔（秒）
+            polling_interval: ポーリング間隔の上限（秒）
             timeout: タイムアウト時間（秒）
+            initial_interval: 最初のポーリング間隔（秒）
             
         Returns:
             最終結果辞書
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
+        delay = initial_interval
         
         print(f"ジョブ {job_id} の完了を待機中（タイムアウト: {timeout}秒）...")
         
         while True:
             # タイムアウトチェック
-            if time.time() - start_time > timeout:
+            if time.perf_counter() - start_time > timeout:
                 return {
                     "success": False,
                     "error": f"タイムアウト（{timeout}秒）",
@@ -268,8 +284,9 @@ class BackgroundHandler:
                     "job_id": job_id
                 }
             
-            # 待機
-            await asyncio.sleep(polling_interval)
+            # 待機（指数バックオフ）
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, polling_interval)
     
     def list_active_jobs(self) -> List[Dict[str, Any]]:
         """アクティブなジョブ一覧を取得"""
@@ -320,10 +337,14 @@ class BackgroundHandler:
         
         job_id = result["job_id"]
         
-        # ステータス確認
-        max_attempts = 30  # 最大30回（5分）
-        for attempt in range(max_attempts):
-            time.sleep(10)  # 10秒待機
+        # ステータス確認（0.25秒から倍々に延ばし4秒で頭打ち、全体で最大5分）
+        delay = 0.25
+        deadline = time.monotonic() + 300
+        attempt = 0
+        while time.monotonic() < deadline:
+            time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+            delay = min(delay * 2, 4.0)
+            attempt += 1
             
             status = self.check_status(job_id)
             if not status["success"]:
@@ -343,7 +364,7 @@ class BackgroundHandler:
                 print(f"NG ジョブが失敗: {status.get('error', '原因不明')}")
                 return False
             
-            print(f"待機中... ({attempt + 1}/{max_attempts})")
+            print(f"待機中... (確認{attempt}回目)")
         
         print("NG タイムアウト")
         return False
@@ -13,39 +13,102 @@ low/medium/high推論レベル対応
     handler = ReasoningHandler(client)
     
     result = handler.basic_reasoning("質問", effort="medium")
-    results = handler.test_all_levels("複雑な質問")
+    results = handler.test_all_levels("複雑な質問")  # 3レベルを並行実行
+    batch = handler.batch_reasoning(["質問1", "質問2"], effort="low")
+    
+    # 非同期コードからの利用
+    async_handler = AsyncReasoningHandler(client)
+    result = await async_handler.basic_reasoning("質問", effort="medium")
 
 作成日: 2025-07-19（o3_pro_complete_toolkit.pyから抽出）
 """
 
+import asyncio
 import time
-from typing import Dict, Any, Optional
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
 from core.azure_auth import O3ProClient
+from core.response_cache import DiskCache
+from handlers.prompt_prefix import DEFAULT_SYSTEM_PREFIX, build_cached_input
+
+
+@dataclass(slots=True)
+class ReasoningResult:
+    """1回分の推論結果（集計処理で属性アクセスするための軽量コンテナ）"""
+    success: bool
+    response: str = ""
+    error: str = ""
+    effort: str = ""
+    duration: float = 0.0
+    question: str = ""
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON保存・表示用の辞書に変換"""
+        return asdict(self)
 
 
 class ReasoningHandler:
     """基本推論処理ハンドラークラス（動作確認済み）"""
     
-    def __init__(self, client: O3ProClient):
+    def __init__(
+        self,
+        client: O3ProClient,
+        system_prefix: Optional[str] = None,
+        cache: Optional[DiskCache] = None
+    ):
         """
         ハンドラー初期化
         
         Args:
             client: 認証済みのO3ProClientインスタンス
+            system_prefix: プロンプトキャッシュ用の固定システムプレフィックス
+                （省略時はDEFAULT_SYSTEM_PREFIX）
+            cache: 推論結果のディスクキャッシュ
+                （省略時は O3_RESPONSE_CACHE=true の場合のみ有効）
         """
         self.client = client
         self.deployment = client.config.deployment
+        self._system_prefix = system_prefix or DEFAULT_SYSTEM_PREFIX
+        # API呼び出しの単一窓口（レート制限・リトライ込み）を束縛しておく
+        self._create = client.create_response
+        self._cache_ttl = client.config.response_cache_ttl
+        if cache is None and client.config.response_cache_enabled:
+            cache = DiskCache(client.config.response_cache_path)
+        self._cache = cache
     
-    def basic_reasoning(self, question: str, effort: str = "low") -> Dict[str, Any]:
+    def _invoke(self, question: str, effort: str) -> Tuple[str, float]:
+        """
+        推論API呼び出しの共通処理（例外はそのまま送出）
+        
+        Returns:
+            (応答テキスト, 実行時間)
+        """
+        start_time = time.perf_counter()
+        
+        response = self._create(
+            model=self.deployment,
+            input=build_cached_input(self._system_prefix, question),
+            reasoning={"effort": effort}
+        )
+        
+        return response.output_text, time.perf_counter() - start_time
+    
+    def basic_reasoning(
+        self,
+        question: str,
+        effort: str = "low",
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
         """
         基本推論実行（デバッグ済み）
         
         Args:
             question: 質問内容
             effort: 推論努力レベル ("low", "medium", "high")
+            use_cache: ディスクキャッシュを参照・保存するか
             
         Returns:
-            推論結果辞書
+            推論結果辞書（キャッシュから返した場合は "cached": True を含む）
         """
         if not self.client.is_ready():
             return {
@@ -53,19 +116,18 @@ class ReasoningHandler:
                 "error": "クライアントが初期化されていません"
             }
         
+        cache_key = None
+        if use_cache and self._cache is not None:
+            cache_key = DiskCache.make_key(self.deployment, effort, self._system_prefix, question)
+            cached = self._cache.get(cache_key, self._cache_ttl)
+            if cached is not None:
+                cached["cached"] = True
+                return cached
+        
         try:
-            start_time = time.time()
-            
-            response = self.client.client.responses.create(
-                model=self.deployment,
-                input=question,
-                reasoning={"effort": effort}
-            )
-            
-            duration = time.time() - start_time
-            result_text = response.output_text
+            result_text, duration = self._invoke(question, effort)
             
-            return {
+            result = {
                 "success": True,
                 "response": result_text,
                 "effort": effort,
@@ -73,6 +135,11 @@ class ReasoningHandler:
                 "question": question
             }
             
+            if cache_key is not None:
+                self._cache.put(cache_key, result)
+            
+            return result
+            
         except Exception as e:
             error_msg = f"基本推論失敗: {e}"
             return {
@@ -86,78 +153,89 @@ class ReasoningHandler:
         """
         全推論レベルでのテスト実行（デバッグ済み）
         
+        AsyncReasoningHandlerで3レベルを並行実行する同期ラッパー
+        
         Args:
             question: テスト質問
             
         Returns:
             全レベルの結果辞書
         """
-        print("\n=== 推論レベル別テスト ===")
-        print(f"質問: {question}")
-        
-        levels = ["low", "medium", "high"]
-        results = {}
+        return self._run_async(lambda handler: handler.test_all_levels(question))
+    
+    def batch_reasoning(
+        self,
+        questions: List[str],
+        effort: str = "low",
+        concurrency: int = 8
+    ) -> List[ReasoningResult]:
+        """
+        複数の独立した質問を並行実行（AsyncReasoningHandler.batch_reasoningの同期ラッパー）
         
-        for level in levels:
+        Args:
+            questions: 質問リスト
+            effort: 推論努力レベル
+            concurrency: 同時実行数の上限
+            
+        Returns:
+            入力順の推論結果リスト
+        """
+        return self._run_async(
+            lambda handler: handler.batch_reasoning(questions, effort, concurrency)
+        )
+    
+    def _run_async(self, call: Callable[["AsyncReasoningHandler"], Awaitable[Any]]) -> Any:
+        """一時的な非同期クライアントでAsyncReasoningHandlerの処理を実行"""
+        async def _run() -> Any:
+            async_client = self.client.create_async_client()
             try:
-                print(f"\n{level.upper()}レベルテスト中...")
-                start_time = time.time()
-                
-                response = self.client.client.responses.create(
-                    model=self.deployment,
-                    input=question,
-                    reasoning={"effort": level}
+                handler = AsyncReasoningHandler(
+                    self.client, self._system_prefix, async_client=async_client
                 )
-                
-                duration = time.time() - start_time
-                result_text = response.output_text
-                
-                results[level] = {
-                    "success": True,
-                    "response": result_text,
-                    "duration": duration
-                }
-                
-                print(f"OK {level.upper()}レベル成功（{duration:.1f}秒）")
-                print(f"回答: {result_text[:100]}...")
-                
-            except Exception as e:
-                print(f"NG {level.upper()}レベル失敗: {e}")
-                results[level] = {
-                    "success": False,
-                    "error": str(e),
-                    "duration": 0
-                }
+                return await call(handler)
+            finally:
+                if async_client is not None:
+                    await async_client.close()
         
-        return {
-            "question": question,
-            "levels": results,
-            "summary": self._generate_summary(results)
-        }
+        return asyncio.run(_run())
     
-    def _generate_summary(self, results: Dict[str, Any]) -> Dict[str, Any]:
-        """結果サマリーを生成"""
-        total_tests = len(results)
-        successful_tests = sum(1 for r in results.values() if r.get("success", False))
-        
-        # 実行時間の統計
-        durations = [r.get("duration", 0) for r in results.values() if r.get("success", False)]
-        avg_duration = sum(durations) / len(durations) if durations else 0
-        
+    @staticmethod
+    def _generate_summary(results: Dict[str, ReasoningResult]) -> Dict[str, Any]:
+        """結果サマリーを生成（1パスで集計）"""
+        total_tests = 0
+        successful_tests = 0
+        total_duration = 0.0
+        fastest_level, fastest_duration = None, float('inf')
+        slowest_level, slowest_duration = None, -1.0
+
+        for level, r in results.items():
+            total_tests += 1
+            if not r.success:
+                continue
+
+            successful_tests += 1
+            duration = r.duration
+            total_duration += duration
+            if duration < fastest_duration:
+                fastest_level, fastest_duration = level, duration
+            if duration > slowest_duration:
+                slowest_level, slowest_duration = level, duration
+
         return {
             "total_tests": total_tests,
             "successful_tests": successful_tests,
             "success_rate": (successful_tests / total_tests * 100) if total_tests > 0 else 0,
-            "average_duration": avg_duration,
-            "fastest_level": min(results.keys(), key=lambda k: results[k].get("duration", float('inf'))) if durations else None,
-            "slowest_level": max(results.keys(), key=lambda k: results[k].get("duration", 0)) if durations else None
+            "average_duration": total_duration / successful_tests if successful_tests else 0,
+            "fastest_level": fastest_level,
+            "slowest_level": slowest_level
         }
     
     def quick_test(self) -> bool:
         """クイックテスト実行"""
         print("\n=== 推論ハンドラークイックテスト ===")
         
-        result = self.basic_reasoning("1+1は何ですか？", effort="low")
+        # スモークテストは常に実APIを呼び出す
+        result = self.basic_reasoning("1+1は何ですか？", effort="low", use_cache=False)
         
         if result["success"]:
             print("OK 推論ハンドラーテスト成功")
@@ -167,6 +245,170 @@ class ReasoningHandler:
             return False
 
 
+class AsyncReasoningHandler:
+    """非同期推論処理ハンドラークラス（AsyncAzureOpenAI使用）"""
+    
+    LEVELS = ["low", "medium", "high"]
+    
+    def __init__(
+        self,
+        client: O3ProClient,
+        system_prefix: Optional[str] = None,
+        async_client=None
+    ):
+        """
+        ハンドラー初期化
+        
+        Args:
+            client: 認証済みのO3ProClientインスタンス
+            system_prefix: プロンプトキャッシュ用の固定システムプレフィックス
+            async_client: 使用するAsyncAzureOpenAI（省略時はclientの共有インスタンス）
+        """
+        self.client = client
+        self.deployment = client.config.deployment
+        self._system_prefix = system_prefix or DEFAULT_SYSTEM_PREFIX
+        self.async_client = async_client or client.get_async_client()
+    
+    async def _call(self, question: str, effort: str) -> ReasoningResult:
+        """1回分のAPI呼び出し（例外はそのまま送出）"""
+        start_time = time.perf_counter()
+        
+        response = await self.client.acreate_response(
+            self.async_client,
+            model=self.deployment,
+            input=build_cached_input(self._system_prefix, question),
+            reasoning={"effort": effort}
+        )
+        
+        return ReasoningResult(
+            success=True,
+            response=response.output_text,
+            effort=effort,
+            duration=time.perf_counter() - start_time,
+            question=question
+        )
+    
+    async def basic_reasoning(self, question: str, effort: str = "low") -> Dict[str, Any]:
+        """
+        基本推論実行（非同期）
+        
+        Args:
+            question: 質問内容
+            effort: 推論努力レベル ("low", "medium", "high")
+            
+        Returns:
+            推論結果辞書（ReasoningHandler.basic_reasoningと同形式）
+        """
+        if self.async_client is None:
+            return {
+                "success": False,
+                "error": "クライアントが初期化されていません"
+            }
+        
+        try:
+            return (await self._call(question, effort)).to_dict()
+            
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"基本推論失敗: {e}",
+                "effort": effort,
+                "question": question
+            }
+    
+    async def test_all_levels(self, question: str) -> Dict[str, Any]:
+        """
+        全推論レベルを並行実行
+        
+        Args:
+            question: テスト質問
+            
+        Returns:
+            全レベルの結果辞書（ReasoningHandler.test_all_levelsと同形式）
+        """
+        print("\n=== 推論レベル別テスト（並行実行） ===")
+        print(f"質問: {question}")
+        
+        if self.async_client is None:
+            print("NG クライアントが初期化されていません")
+            outcomes: List[Any] = [
+                RuntimeError("クライアントが初期化されていません") for _ in self.LEVELS
+            ]
+        else:
+            outcomes = await asyncio.gather(
+                *(self._call(question, level) for level in self.LEVELS),
+                return_exceptions=True
+            )
+        
+        results: Dict[str, ReasoningResult] = {}
+        for level, outcome in zip(self.LEVELS, outcomes):
+            if isinstance(outcome, BaseException):
+                print(f"NG {level.upper()}レベル失敗: {outcome}")
+                results[level] = ReasoningResult(
+                    success=False,
+                    error=str(outcome),
+                    effort=level,
+                    question=question
+                )
+            else:
+                print(f"OK {level.upper()}レベル成功（{outcome.duration:.1f}秒）")
+                print(f"回答: {outcome.response[:100]}...")
+                results[level] = outcome
+        
+        return {
+            "question": question,
+            "levels": {level: r.to_dict() for level, r in results.items()},
+            "summary": ReasoningHandler._generate_summary(results)
+        }
+    
+    async def batch_reasoning(
+        self,
+        questions: List[str],
+        effort: str = "low",
+        concurrency: int = 8
+    ) -> List[ReasoningResult]:
+        """
+        複数の独立した質問を並行実行
+        
+        個々のリクエストの応答時間は短くならないが、全体のスループットは
+        同時実行数（およびデプロイメントのTPM/RPM上限）に応じて向上する。
+        
+        Args:
+            questions: 質問リスト
+            effort: 推論努力レベル
+            concurrency: 同時実行数の上限
+            
+        Returns:
+            入力順の推論結果リスト（失敗した質問は success=False）
+        """
+        if self.async_client is None:
+            return [
+                ReasoningResult(
+                    success=False,
+                    error="クライアントが初期化されていません",
+                    effort=effort,
+                    question=question
+                )
+                for question in questions
+            ]
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def run_one(question: str) -> ReasoningResult:
+            async with semaphore:
+                try:
+                    return await self._call(question, effort)
+                except Exception as e:
+                    return ReasoningResult(
+                        success=False,
+                        error=f"基本推論失敗: {e}",
+                        effort=effort,
+                        question=question
+                    )
+        
+        return await asyncio.gather(*(run_one(question) for question in questions))
+
+
 # 使用例とテスト関数
 def test_reasoning_handler():
     """推論ハンドラーのテスト"""
@@ -20,27 +20,79 @@
         print(chunk_text, end='', flush=True)
     
     result = handler.stream_with_callback("質問内容", on_chunk)
+    
+    # 非同期ストリーミング（イベントループ内で）
+    async for chunk_text in handler.stream_iter("質問内容"):
+        print(chunk_text, end='', flush=True)
 
 作成日: 2025-07-19（o3_pro_complete_toolkit.pyから抽出）
 """
 
+import asyncio
 import time
-from typing import Dict, Any, Optional, Callable, Iterator
+from typing import Dict, Any, Optional, Callable, Iterator, AsyncIterator, List, Tuple
 from core.azure_auth import O3ProClient
+from handlers.prompt_prefix import DEFAULT_SYSTEM_PREFIX, build_cached_input
 
 
 class StreamingHandler:
     """ストリーミング処理ハンドラークラス（動作確認済み）"""
     
-    def __init__(self, client: O3ProClient):
+    def __init__(self, client: O3ProClient, system_prefix: Optional[str] = None):
         """
         ハンドラー初期化
         
         Args:
             client: 認証済みのO3ProClientインスタンス
+            system_prefix: プロンプトキャッシュ用の固定システムプレフィックス
+                （省略時はDEFAULT_SYSTEM_PREFIX）
         """
         self.client = client
         self.deployment = client.config.deployment
+        self._system_prefix = system_prefix or DEFAULT_SYSTEM_PREFIX
+        # API呼び出しの単一窓口（レート制限・リトライ込み）を束縛しておく
+        self._create = client.create_response
+    
+    def _invoke(
+        self,
+        question: str,
+        effort: str,
+        on_chunk: Callable[[str], None]
+    ) -> Tuple[str, float, int]:
+        """
+        ストリーミングAPI呼び出しの共通処理（例外はそのまま送出）
+        
+        Args:
+            question: 質問内容
+            effort: 推論努力レベル
+            on_chunk: 差分テキスト受信時に呼ばれる関数
+            
+        Returns:
+            (応答全文, 実行時間, チャンク数)
+        """
+        start_time = time.perf_counter()
+        
+        stream = self._create(
+            model=self.deployment,
+            input=build_cached_input(self._system_prefix, question),
+            reasoning={"effort": effort},
+            stream=True
+        )
+        
+        parts: List[str] = []
+        chunk_count = 0
+        
+        for event in stream:
+            chunk_count += 1
+            # o3-proのストリーミングAPIはイベントベース
+            if event.type == "response.output_text.delta":
+                chunk_text = getattr(event, "delta", None)
+                if chunk_text is not None:
+                    parts.append(chunk_text)
+                    on_chunk(chunk_text)
+        
+        duration = time.perf_counter() - start_time
+        return "".join(parts), duration, chunk_count
     
     def stream_response(self, question: str, effort: str = "low") -> Dict[str, Any]:
         """
@@ -64,29 +116,10 @@ class StreamingHandler:
             print(f"質問: {question}")
             print("ストリーミング開始...")
             
-            start_time = time.time()
-            
-            stream = self.client.client.responses.create(
-                model=self.deployment,
-                input=question,
-                reasoning={"effort": effort},
-                stream=True
+            full_response, duration, chunk_count = self._invoke(
+                question, effort, lambda chunk_text: print(chunk_text, end='', flush=True)
             )
             
-            full_response = ""
-            chunk_count = 0
-            
-            for event in stream:
-                chunk_count += 1
-                # o3-proのストリーミングAPIはイベントベース
-                if event.type == "response.output_text.delta":
-                    if hasattr(event, 'delta'):
-                        chunk_text = event.delta
-                        print(chunk_text, end='', flush=True)
-                        full_response += chunk_text
-            
-            duration = time.time() - start_time
-            
             print()  # 改行
             print(f"OK ストリーミング成功（チャンク数: {chunk_count}、実行時間: {duration:.1f}秒）")
             
@@ -132,34 +165,15 @@ class StreamingHandler:
                 "error": "クライアントが初期化されていません"
             }
         
+        # コールバックの例外でストリーミング全体を中断しない
+        def safe_on_chunk(chunk_text: str):
+            try:
+                on_chunk(chunk_text)
+            except Exception as callback_error:
+                print(f"\nWARN コールバックエラー: {callback_error}")
+        
         try:
-            start_time = time.time()
-            
-            stream = self.client.client.responses.create(
-                model=self.deployment,
-                input=question,
-                reasoning={"effort": effort},
-                stream=True
-            )
-            
-            full_response = ""
-            chunk_count = 0
-            
-            for event in stream:
-                chunk_count += 1
-                # o3-proのストリーミングAPIはイベントベース
-                if event.type == "response.output_text.delta":
-                    if hasattr(event, 'delta'):
-                        chunk_text = event.delta
-                        full_response += chunk_text
-                        
-                        # コールバック実行
-                        try:
-                            on_chunk(chunk_text)
-                        except Exception as callback_error:
-                            print(f"\nWARN コールバックエラー: {callback_error}")
-            
-            duration = time.time() - start_time
+            full_response, duration, chunk_count = self._invoke(question, effort, safe_on_chunk)
             
             return {
                 "success": True,
@@ -179,13 +193,24 @@ class StreamingHandler:
                 "question": question
             }
     
-    def stream_generator(self, question: str, effort: str = "low") -> Iterator[str]:
+    def stream_generator(
+        self,
+        question: str,
+        effort: str = "low",
+        min_chunk_chars: int = 0,
+        max_latency_s: float = 0.05
+    ) -> Iterator[str]:
         """
         ジェネレータ形式でのストリーミング
         
+        min_chunk_chars を指定すると、細かい差分をまとめてから返す
+        （消費側の1回あたりの処理コストが大きい場合に有効）
+        
         Args:
             question: 質問内容
             effort: 推論努力レベル
+            min_chunk_chars: まとめて返す最小文字数（0で差分ごとに返す）
+            max_latency_s: 最小文字数に達しなくても返すまでの最大待ち時間（秒）
             
         Yields:
             チャンクテキスト
@@ -194,23 +219,112 @@ class StreamingHandler:
             yield f"ERROR: クライアントが初期化されていません"
             return
         
+        buffer: List[str] = []
+        buffered_chars = 0
+        
         try:
-            stream = self.client.client.responses.create(
+            stream = self._create(
                 model=self.deployment,
-                input=question,
+                input=build_cached_input(self._system_prefix, question),
                 reasoning={"effort": effort},
                 stream=True
             )
             
+            buffer_started = time.monotonic()
             for event in stream:
                 # o3-proのストリーミングAPIはイベントベース
                 if event.type == "response.output_text.delta":
-                    if hasattr(event, 'delta'):
-                        yield event.delta
+                    chunk_text = getattr(event, "delta", None)
+                    if chunk_text is None:
+                        continue
+                    
+                    if not buffer:
+                        buffer_started = time.monotonic()
+                    buffer.append(chunk_text)
+                    buffered_chars += len(chunk_text)
+                    
+                    if (buffered_chars >= min_chunk_chars
+                            or time.monotonic() - buffer_started >= max_latency_s):
+                        yield "".join(buffer)
+                        buffer.clear()
+                        buffered_chars = 0
+            
+            if buffer:
+                yield "".join(buffer)
                     
         except Exception as e:
+            if buffer:
+                yield "".join(buffer)
             yield f"ERROR: ストリーミング失敗: {e}"
     
+    async def stream_iter(
+        self,
+        question: str,
+        effort: str = "low",
+        min_chunk_chars: int = 0,
+        max_latency_s: float = 0.05,
+        async_client=None
+    ) -> AsyncIterator[str]:
+        """
+        非同期ジェネレータ形式でのストリーミング（async for で消費）
+        
+        受信待ちでイベントループをブロックしないため、消費側は応答受信中に
+        他の非同期処理（履歴保存など）を並行実行できる。
+        stream_generator と異なり、失敗時は例外をそのまま送出する。
+        
+        Args:
+            question: 質問内容
+            effort: 推論努力レベル
+            min_chunk_chars: まとめて返す最小文字数（0で差分ごとに返す）
+            max_latency_s: 最小文字数に達しなくても返すまでの最大待ち時間（秒）
+            async_client: 使用するAsyncAzureOpenAI（省略時はclientの共有インスタンス）
+            
+        Yields:
+            チャンクテキスト
+        """
+        async_client = async_client or self.client.get_async_client()
+        if async_client is None:
+            raise RuntimeError("クライアントが初期化されていません")
+        
+        stream = await self.client.acreate_response(
+            async_client,
+            model=self.deployment,
+            input=build_cached_input(self._system_prefix, question),
+            reasoning={"effort": effort},
+            stream=True
+        )
+        
+        buffer: List[str] = []
+        buffered_chars = 0
+        buffer_started = time.monotonic()
+        
+        try:
+            async for event in stream:
+                # o3-proのストリーミングAPIはイベントベース
+                if event.type == "response.output_text.delta":
+                    chunk_text = getattr(event, "delta", None)
+                    if chunk_text is None:
+                        continue
+                    
+                    if not buffer:
+                        buffer_started = time.monotonic()
+                    buffer.append(chunk_text)
+                    buffered_chars += len(chunk_text)
+                    
+                    if (buffered_chars >= min_chunk_chars
+                            or time.monotonic() - buffer_started >= max_latency_s):
+                        yield "".join(buffer)
+                        buffer.clear()
+                        buffered_chars = 0
+        except Exception:
+            # 受信済みの分を返してから例外を伝える
+            if buffer:
+                yield "".join(buffer)
+            raise
+        
+        if buffer:
+            yield "".join(buffer)
+    
     def quick_test(self) -> bool:
         """クイックテスト実行"""
         print("\n=== ストリーミングハンドラークイックテスト ===")
@@ -225,55 +339,59 @@ class StreamingHandler:
             return False
     
     def test_all_modes(self) -> Dict[str, Any]:
-        """全ストリーミングモードのテスト"""
-        print("\n=== 全ストリーミングモードテスト ===")
+        """
+        全ストリーミングモードのテスト
         
-        question = "Python プログラミングについて説明してください"
-        results = {}
+        3モードは互いに独立しているため asyncio.gather で並行実行する。
+        出力が混ざらないよう、標準出力へのチャンク表示は基本ストリーミングのみ行う。
+        """
+        print("\n=== 全ストリーミングモードテスト（並行実行） ===")
         
-        # 基本ストリーミング
-        print("\n1. 基本ストリーミングテスト:")
-        results["basic"] = self.stream_response(question, effort="low")
+        question = "Python プログラミングについて説明してください"
         
         # コールバック付きストリーミング
-        print("\n2. コールバック付きストリーミングテスト:")
-        callback_output = []
-        
-        def collect_chunks(chunk):
-            callback_output.append(chunk)
-        
-        results["callback"] = self.stream_with_callback(question, collect_chunks, effort="low")
-        results["callback"]["callback_chunks"] = len(callback_output)
+        def run_callback() -> Dict[str, Any]:
+            callback_output = []
+            result = self.stream_with_callback(question, callback_output.append, effort="low")
+            result["callback_chunks"] = len(callback_output)
+            return result
         
         # ジェネレータストリーミング
-        print("\n3. ジェネレータストリーミングテスト:")
-        generator_chunks = []
-        try:
-            for chunk in self.stream_generator(question, effort="low"):
-                generator_chunks.append(chunk)
-                print(chunk, end='', flush=True)
-            
-            print()
-            results["generator"] = {
+        def run_generator() -> Dict[str, Any]:
+            generator_chunks = list(self.stream_generator(question, effort="low"))
+            return {
                 "success": True,
                 "chunk_count": len(generator_chunks),
                 "total_length": sum(len(chunk) for chunk in generator_chunks)
             }
-            print("OK ジェネレータストリーミング成功")
-            
-        except Exception as e:
-            results["generator"] = {
-                "success": False,
-                "error": str(e)
-            }
-            print(f"NG ジェネレータストリーミング失敗: {e}")
+        
+        async def run_all():
+            return await asyncio.gather(
+                asyncio.to_thread(self.stream_response, question, "low"),
+                asyncio.to_thread(run_callback),
+                asyncio.to_thread(run_generator),
+                return_exceptions=True
+            )
+        
+        results = {}
+        for name, outcome in zip(["basic", "callback", "generator"], asyncio.run(run_all())):
+            if isinstance(outcome, BaseException):
+                results[name] = {
+                    "success": False,
+                    "error": str(outcome)
+                }
+                print(f"NG {name}ストリーミング失敗: {outcome}")
+            else:
+                results[name] = outcome
+                status = "OK" if outcome.get("success", False) else "NG"
+                print(f"{status} {name}ストリーミング完了")
         
         # サマリー
         success_count = sum(1 for r in results.values() if r.get("success", False))
         results["summary"] = {
-            "total_tests": len(results) - 1,  # summaryを除く
+            "total_tests": len(results),
             "successful_tests": success_count,
-            "success_rate": (success_count / (len(results) - 1) * 100)
+            "success_rate": (success_count / len(results) * 100)
         }
         
         return results
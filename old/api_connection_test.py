@@ -12,87 +12,148 @@ API接続テストスクリプト
 """
 
 import sys
+import time
+import asyncio
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 # プロジェクトルートをパスに追加
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from core.azure_auth import O3ProConfig, O3ProClient
-from core.error_handler import ErrorHandler, safe_api_call
-from handlers import ReasoningHandler, StreamingHandler
+# SDKを含む重いモジュールは実際に使うテスト関数内で読み込む（早期終了時の起動コスト削減）
+if TYPE_CHECKING:
+    from core.azure_auth import O3ProConfig, O3ProClient
 
 
-def test_api_connection():
-    """API接続テスト"""
-    print("=" * 60)
-    print("Azure OpenAI o3-pro API接続テスト開始")
-    print("=" * 60)
+async def stream_via_queue(client: "O3ProClient", question: str, effort: str = "low") -> dict:
+    """
+    プロデューサー/コンシューマー方式のストリーミングテスト
+    
+    プロデューサーはネットワークからのイベント受信だけを行い、差分をキューに積む。
+    コンシューマーはキューから取り出して集計する（キューが空なら待機）。
+    
+    Returns:
+        StreamingHandler.stream_responseと同形式の結果辞書
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    stats = {"chunk_count": 0, "parts": []}
+    done = object()
+    
+    async def producer():
+        try:
+            stream = await client.acreate_response(
+                client.get_async_client(),
+                model=client.config.deployment,
+                input=question,
+                reasoning={"effort": effort},
+                stream=True
+            )
+            async for event in stream:
+                await queue.put(event)
+        finally:
+            await queue.put(done)
     
+    async def consumer():
+        while True:
+            event = await queue.get()
+            if event is done:
+                return
+            stats["chunk_count"] += 1
+            if event.type == "response.output_text.delta":
+                chunk_text = getattr(event, "delta", None)
+                if chunk_text is not None:
+                    stats["parts"].append(chunk_text)
+    
+    start_time = time.perf_counter()
     try:
-        # 設定とクライアント初期化
-        print("\n=== 設定とクライアント初期化 ===")
-        config = O3ProConfig()
-        
-        if not config.validate():
-            print("NG 設定が不正です")
-            return False
-        
-        print(f"OK エンドポイント: {config.endpoint}")
-        print(f"OK デプロイメント: {config.deployment}")
-        print(f"OK API バージョン: {config.api_version}")
+        await asyncio.gather(producer(), consumer())
+    except Exception as e:
+        return {"success": False, "error": f"ストリーミング失敗: {e}"}
+    
+    return {
+        "success": True,
+        "response": "".join(stats["parts"]),
+        "chunk_count": stats["chunk_count"],
+        "duration": time.perf_counter() - start_time,
+        "effort": effort,
+        "question": question
+    }
+
+
+def test_error_handler_offline() -> bool:
+    """
+    ErrorHandler.handle_api_call のリトライ動作をモッククライアントで確認
+    
+    1回目に一時的な接続エラーを発生させ、2回目の成功レスポンスが返ることを確認する。
+    実際のAPI呼び出しは行わない。
+    """
+    from types import SimpleNamespace
+    from core.error_handler import ErrorHandler
+    
+    calls = []
+    
+    def create(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            raise ConnectionError("connection reset by peer")
+        return SimpleNamespace(output_text="2")
+    
+    mock_client = SimpleNamespace(responses=SimpleNamespace(create=create))
+    error_handler = ErrorHandler(max_retries=1, base_delay=0)
+    
+    api_result = error_handler.handle_api_call(mock_client, model="mock", input="1+1は？")
+    
+    if getattr(api_result, "output_text", None) == "2" and len(calls) == 2:
+        print("OK エラーハンドリング機能テスト成功（一時エラー後のリトライで回復）")
+        return True
+    
+    print(f"NG エラーハンドリング機能テスト失敗: {api_result}（呼び出し回数: {len(calls)}）")
+    return False
+
+
+async def test_api_connection(config: "O3ProConfig", client: "O3ProClient"):
+    """API接続テスト（非ストリーミング1回とストリーミング1回を並行実行）"""
+    try:
+        from handlers import AsyncReasoningHandler
         
-        # クライアント初期化（API Key優先）
-        client = O3ProClient(config, auth_method="api_key")
+        reasoning_handler = AsyncReasoningHandler(client)
         
-        if not client.is_ready():
-            print("NG クライアント初期化失敗")
-            return False
+        # 非ストリーミングの2問は1回のリクエストにまとめ、回答を行ごとに分けて確認する
+        questions = ["2+2は？", "1+1は？"]
+        combined_question = "\n".join(
+            f"Q{i}: {q}" for i, q in enumerate(questions, 1)
+        ) + "\n各行に分けて回答してください"
         
-        print("OK クライアント初期化成功")
+        # ストリーミングは別経路（チャンク転送）を確認するため個別のリクエストで並行実行
+        print("\n=== 基本推論・ストリーミングテストを並行実行 ===")
+        result, stream_result = await asyncio.gather(
+            reasoning_handler.basic_reasoning(combined_question, effort="low"),
+            stream_via_queue(client, "日本の首都は？", effort="low")
+        )
         
         # 基本推論テスト
         print("\n=== 基本推論テスト（lowレベル） ===")
-        reasoning_handler = ReasoningHandler(client)
-        
-        test_question = "2+2の計算結果を教えてください"
-        result = reasoning_handler.basic_reasoning(test_question, effort="low")
-        
         if result["success"]:
             print("OK 基本推論テスト成功")
-            print(f"   質問: {test_question}")
-            print(f"   回答: {result['response'][:100]}...")
+            answers = [line.strip() for line in result["response"].splitlines() if line.strip()]
+            for question, answer in zip(questions, answers):
+                print(f"   質問: {question}")
+                print(f"   回答: {answer[:100]}")
+            if len(answers) < len(questions):
+                print(f"   WARN 回答行数が質問数より少ない: {len(answers)}/{len(questions)}")
             print(f"   実行時間: {result['duration']:.1f}秒")
         else:
             print(f"NG 基本推論テスト失敗: {result.get('error')}")
             return False
         
-        # エラーハンドリング機能テスト
+        # エラーハンドリング機能テスト（API呼び出しなし）
         print("\n=== エラーハンドリング機能テスト ===")
-        error_handler = ErrorHandler(max_retries=1)
-        
-        # 正常なAPI呼び出しテスト
-        api_params = {
-            "model": config.deployment,
-            "input": "簡単な質問: 1+1は？",
-            "reasoning": {"effort": "low"}
-        }
-        
-        result = error_handler.handle_api_call(client.client, **api_params)
-        
-        if hasattr(result, 'output_text'):
-            print("OK エラーハンドリング機能テスト成功")
-            print(f"   回答: {result.output_text[:100]}...")
-        else:
-            print(f"NG エラーハンドリング機能テスト失敗: {result}")
+        if not test_error_handler_offline():
             return False
         
         # ストリーミングテスト（短時間）
         print("\n=== ストリーミングテスト ===")
-        streaming_handler = StreamingHandler(client)
-        
-        stream_result = streaming_handler.stream_response("日本の首都は？", effort="low")
-        
         if stream_result["success"]:
             print("OK ストリーミングテスト成功")
             print(f"   チャンク数: {stream_result['chunk_count']}")
@@ -113,20 +174,16 @@ def test_api_connection():
         return False
 
 
-def test_safe_api_call():
+async def test_safe_api_call(config: "O3ProConfig", client: "O3ProClient"):
     """safe_api_call関数の単体テスト"""
     print("\n=== safe_api_call関数テスト ===")
     
     try:
-        config = O3ProConfig()
-        client = O3ProClient(config, auth_method="api_key")
+        from core.error_handler import safe_api_call
         
-        if not client.is_ready():
-            print("クライアント初期化失敗のためテストをスキップ")
-            return True
-        
-        # safe_api_call関数を使用
-        result = safe_api_call(
+        # safe_api_call関数を使用（同期APIのためスレッドで実行）
+        result = await asyncio.to_thread(
+            safe_api_call,
             client.client,
             model=config.deployment,
             input="テスト質問: 3+3は？",
@@ -146,13 +203,52 @@ def test_safe_api_call():
         return False
 
 
+async def run_all_tests():
+    """設定とクライアントを1回だけ初期化し、2つのテストで共有して並行実行"""
+    print("=" * 60)
+    print("Azure OpenAI o3-pro API接続テスト開始")
+    print("=" * 60)
+    
+    try:
+        from core.azure_auth import O3ProConfig, O3ProClient
+        
+        # 設定とクライアント初期化
+        print("\n=== 設定とクライアント初期化 ===")
+        config = O3ProConfig()
+        
+        if not config.validate():
+            print("NG 設定が不正です")
+            return False, False
+        
+        print(f"OK エンドポイント: {config.endpoint}")
+        print(f"OK デプロイメント: {config.deployment}")
+        print(f"OK API バージョン: {config.api_version}")
+        
+        # クライアント初期化（API Key優先）
+        client = O3ProClient(config, auth_method="api_key")
+        
+        if not client.is_ready():
+            print("NG クライアント初期化失敗")
+            return False, False
+        
+        print("OK クライアント初期化成功")
+        
+    except Exception as e:
+        print(f"\nERROR 初期化中に予期しないエラー: {e}")
+        return False, False
+    
+    return await asyncio.gather(
+        test_api_connection(config, client),
+        test_safe_api_call(config, client)
+    )
+
+
 if __name__ == "__main__":
-    success1 = test_api_connection()
-    success2 = test_safe_api_call()
+    success1, success2 = asyncio.run(run_all_tests())
     
     if success1 and success2:
         print("\n✅ 全てのテストが成功しました！モジュールは正常に動作しています。")
         sys.exit(0)
     else:
         print("\n❌ 一部のテストが失敗しました。")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
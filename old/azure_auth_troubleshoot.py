@@ -16,45 +16,151 @@ python azure_auth_troubleshoot.py
 作成日: 2025-01-19
 """
 
+import io
 import os
+import functools
+import json
 import sys
 import subprocess
 import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
+
+
+# 一般的なAzure CLIインストール先（Windowsのみ、プロセス内で1回だけ計算）
+_CANDIDATE_AZ_DIRS = (
+    r"C:\Program Files\Microsoft SDKs\Azure\CLI2\wbin",
+    r"C:\Program Files (x86)\Microsoft SDKs\Azure\CLI2\wbin",
+    f"C:\\Users\\{os.environ.get('USERNAME')}\\AppData\\Local\\Programs\\Azure CLI\\wbin"
+) if os.name == 'nt' else ()
+
+
+@functools.lru_cache(maxsize=None)
+def _existing_az_executables() -> tuple:
+    """既知のインストール先に存在する az.cmd の一覧（結果をキャッシュ）"""
+    return tuple(
+        exe_path for exe_path in (os.path.join(d, "az.cmd") for d in _CANDIDATE_AZ_DIRS)
+        if os.path.isfile(exe_path)
+    )
+
+
+@functools.cache
+def _load_azure_identity():
+    """azure.identityモジュールを読み込む（プロセス内で1回だけ）"""
+    import azure.identity
+    return azure.identity
+
+
+@functools.cache
+def _load_env_file() -> bool:
+    """スクリプト横の.envを読み込む（再解析を避けるため1回だけ）"""
+    from dotenv import load_dotenv
+    
+    env_path = Path(__file__).parent / ".env"
+    if not env_path.exists():
+        return False
+    return load_dotenv(env_path, override=True)
+
+
+def _read_first_line(cmd: List[str], timeout: float) -> str:
+    """
+    コマンドの標準出力を先頭1行だけ読み取り、プロセスを終了させる
+    
+    Raises:
+        subprocess.TimeoutExpired: timeout秒以内に1行目が得られなかった場合
+    """
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                          text=True) as proc:
+        lines: List[str] = []
+        reader = threading.Thread(target=lambda: lines.append(proc.stdout.readline()),
+                                  daemon=True)
+        reader.start()
+        reader.join(timeout)
+        proc.kill()
+        
+        if not lines:
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        return lines[0].strip()
 
 
 class AzureAuthDiagnostic:
     """Azure認証診断クラス"""
     
+    # 診断中の全サブプロセス呼び出しで共有する制限時間（秒）
+    TOTAL_TIMEOUT_SECONDS = 20.0
+    
     def __init__(self):
         self.results: Dict[str, Any] = {}
         self.az_path: Optional[str] = None
+        self._local = threading.local()
+        self._az_lock = threading.Lock()
+        self._az_version_info: Optional[Dict[str, Any]] = None
+        self._deadline = time.monotonic() + self.TOTAL_TIMEOUT_SECONDS
+    
+    def _remaining_timeout(self, limit: float) -> float:
+        """
+        サブプロセスに渡すタイムアウトを計算（個別上限と全体の残り時間の小さい方）
+        
+        Raises:
+            TimeoutError: 診断全体の制限時間を使い切っている場合
+        """
+        remaining = self._deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("診断全体の制限時間を超過しました")
+        return min(limit, remaining)
+    
+    def _log(self, *args):
+        """診断メッセージ出力（並行実行中はプローブごとのバッファに蓄積）"""
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            print(*args)
+        else:
+            print(*args, file=buffer)
+    
+    def _run_probe(self, probe: Callable[[], None]) -> str:
+        """プローブを実行し、その出力をまとめて返す"""
+        self._local.buffer = io.StringIO()
+        try:
+            probe()
+        except Exception as e:
+            self._log(f"   NG 診断エラー: {e}")
+        finally:
+            output = self._local.buffer.getvalue()
+            self._local.buffer = None
+        return output
+    
+    def _run_stage(self, probes: List[Callable[[], None]]):
+        """互いに独立したプローブを並行実行し、出力は宣言順に表示"""
+        with ThreadPoolExecutor(max_workers=len(probes)) as executor:
+            outputs = list(executor.map(self._run_probe, probes))
+        
+        for output in outputs:
+            sys.stdout.write(output)
     
     def run_full_diagnostic(self) -> Dict[str, Any]:
         """完全診断を実行"""
-        print("=== Azure認証診断開始 ===\n")
-        
-        # 1. Azure CLI インストール確認
-        self.check_azure_cli_installation()
-        
-        # 2. PATH環境変数確認
-        self.check_path_environment()
-        
-        # 3. Azure CLI パス検索
-        self.find_azure_cli_executable()
-        
-        # 4. Azure CLI バージョン確認
-        self.test_azure_cli_version()
-        
-        # 5. Azure ログイン状況確認
-        self.check_azure_login_status()
-        
-        # 6. Python Azure SDK確認
-        self.check_azure_python_sdk()
-        
-        # 7. DefaultAzureCredential テスト
-        self.test_default_azure_credential()
+        print("=== Azure認証診断開始 ===")
+        self._deadline = time.monotonic() + self.TOTAL_TIMEOUT_SECONDS
+        
+        # ステージ1: azプロセスを起動しない独立した確認を並行実行
+        self._run_stage([
+            self.check_path_environment,        # 1. PATH環境変数確認
+            self.find_azure_cli_executable,     # 2. Azure CLI パス検索
+            self.check_azure_python_sdk         # 3. Python Azure SDK確認
+        ])
+        
+        # ステージ2: ステージ1の結果（az_path, SDK有無）に依存する確認を並行実行
+        # 4と5は同じ `az version` の結果を共有する
+        self._run_stage([
+            self.check_azure_cli_installation,  # 4. Azure CLI インストール確認
+            self.test_azure_cli_version,        # 5. Azure CLI バージョン確認
+            self.check_azure_login_status,      # 6. Azure ログイン状況確認
+            self.test_default_azure_credential  # 7. DefaultAzureCredential テスト
+        ])
         
         # 8. 診断結果サマリー
         self.print_diagnostic_summary()
@@ -64,162 +170,184 @@ class AzureAuthDiagnostic:
         
         return self.results
     
+    def _run_az_once(self) -> Dict[str, Any]:
+        """
+        `az --version` を1回だけ実行し、結果を共有する
+        
+        インストール確認と直接実行テストの両方がこの結果を参照するため、
+        azプロセスの起動は診断全体で1回に抑えられる。
+        必要なのは先頭行（azure-cliのバージョン）だけなので、読み取り後に
+        プロセスを終了させ、拡張機能の列挙や更新確認を待たない。
+        """
+        with self._az_lock:
+            if self._az_version_info is not None:
+                return self._az_version_info
+            
+            info: Dict[str, Any] = {"ok": False, "version": None, "error": None, "skipped": False}
+            try:
+                first_line = _read_first_line([self.az_path or 'az', '--version'],
+                                              timeout=self._remaining_timeout(15))
+                if first_line.startswith('azure-cli'):
+                    info["ok"] = True
+                    info["version"] = " ".join(first_line.split())
+                else:
+                    info["error"] = f"予期しない出力: {first_line!r}"
+            except subprocess.TimeoutExpired:
+                info["error"] = "コマンドタイムアウト"
+            except TimeoutError as e:
+                info["error"] = str(e)
+                info["skipped"] = True
+            except Exception as e:
+                info["error"] = str(e)
+            
+            self._az_version_info = info
+            return info
+    
     def check_azure_cli_installation(self):
         """Azure CLI インストール確認"""
-        print("1. Azure CLI インストール確認")
+        self._log("\n4. Azure CLI インストール確認")
         
-        try:
-            result = subprocess.run(['az', '--version'], 
-                                  capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                version_info = result.stdout.split('\n')[0]
-                print(f"   OK Azure CLI インストール済み: {version_info}")
-                self.results['azure_cli_installed'] = True
-                self.results['azure_cli_version'] = version_info
-            else:
-                print(f"   NG Azure CLI コマンドエラー: {result.stderr}")
-                self.results['azure_cli_installed'] = False
-                
-        except FileNotFoundError:
-            print("   NG Azure CLI が見つかりません（PATH問題の可能性）")
+        # PATH上に az が無ければプロセスを起動するまでもなくPATH問題と判定
+        if shutil.which('az') is None:
+            self._log("   NG Azure CLI が見つかりません（PATH問題の可能性）")
             self.results['azure_cli_installed'] = False
             self.results['azure_cli_path_issue'] = True
-            
-        except subprocess.TimeoutExpired:
-            print("   NG Azure CLI コマンドタイムアウト")
-            self.results['azure_cli_installed'] = False
-            
-        except Exception as e:
-            print(f"   NG Azure CLI チェックエラー: {e}")
+            return
+        
+        info = self._run_az_once()
+        if info["skipped"]:
+            self._log(f"   SKIP {info['error']}")
+        elif info["ok"]:
+            self._log(f"   OK Azure CLI インストール済み: {info['version']}")
+            self.results['azure_cli_installed'] = True
+            self.results['azure_cli_version'] = info["version"]
+        else:
+            self._log(f"   NG Azure CLI チェックエラー: {info['error']}")
             self.results['azure_cli_installed'] = False
     
     def check_path_environment(self):
         """PATH環境変数確認"""
-        print("\n2. PATH環境変数確認")
+        self._log("\n1. PATH環境変数確認")
         
         path_env = os.environ.get('PATH', '')
-        azure_paths = [p for p in path_env.split(';') 
-                      if 'azure' in p.lower() or 'cli' in p.lower()]
+        path_entries = [p for p in path_env.split(os.pathsep) if p]
+        azure_keywords = ('azure', 'cli')
+        azure_paths = [p for p in path_entries
+                      if any(keyword in p.lower() for keyword in azure_keywords)]
         
         if azure_paths:
-            print("   OK Azure関連のPATHが見つかりました:")
+            self._log("   OK Azure関連のPATHが見つかりました:")
             for path in azure_paths:
-                print(f"      {path}")
+                self._log(f"      {path}")
             self.results['azure_paths_in_env'] = azure_paths
         else:
-            print("   WARN Azure関連のPATHが見つかりません")
+            self._log("   WARN Azure関連のPATHが見つかりません")
             self.results['azure_paths_in_env'] = []
         
-        # 一般的なAzure CLIパスをチェック
-        common_paths = [
-            r"C:\Program Files\Microsoft SDKs\Azure\CLI2\wbin",
-            r"C:\Program Files (x86)\Microsoft SDKs\Azure\CLI2\wbin",
-            f"C:\\Users\\{os.getenv('USERNAME')}\\AppData\\Local\\Programs\\Azure CLI\\wbin"
-        ]
-        
-        existing_paths = [p for p in common_paths if os.path.exists(p)]
+        # 一般的なAzure CLIパスをチェック（Windows以外では候補なし）
+        existing_paths = [p for p in _CANDIDATE_AZ_DIRS if os.path.isdir(p)]
         if existing_paths:
-            print("   INFO 既存のAzure CLIディレクトリ:")
+            path_set = {os.path.normcase(os.path.normpath(p)) for p in path_entries}
+            self._log("   INFO 既存のAzure CLIディレクトリ:")
             for path in existing_paths:
-                print(f"      {path}")
-                in_path = path in path_env
-                print(f"        PATH設定済み: {'Yes' if in_path else 'No'}")
+                self._log(f"      {path}")
+                in_path = os.path.normcase(os.path.normpath(path)) in path_set
+                self._log(f"        PATH設定済み: {'Yes' if in_path else 'No'}")
             self.results['existing_azure_dirs'] = existing_paths
     
     def find_azure_cli_executable(self):
-        """Azure CLI実行ファイル検索"""
-        print("\n3. Azure CLI実行ファイル検索")
+        """Azure CLI実行ファイル検索（安価な確認から順に実施）"""
+        self._log("\n2. Azure CLI実行ファイル検索")
+        
+        # 既知のインストール先を確認（statのみ）
+        existing_executables = _existing_az_executables()
+        if existing_executables:
+            exe_path = existing_executables[0]
+            self._log(f"   OK 既知のインストール先で発見: {exe_path}")
+            self.az_path = exe_path
+            self.results['azure_cli_path'] = exe_path
+            return
         
         # shutil.which() で検索
         az_path = shutil.which('az')
         if az_path:
-            print(f"   OK shutil.which()で発見: {az_path}")
+            self._log(f"   OK shutil.which()で発見: {az_path}")
             self.az_path = az_path
             self.results['azure_cli_path'] = az_path
             return
         
-        # where コマンドで検索
-        try:
-            result = subprocess.run(['where', 'az'], 
-                                  capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                paths = result.stdout.strip().split('\n')
-                print(f"   OK whereコマンドで発見: {paths[0]}")
-                self.az_path = paths[0]
-                self.results['azure_cli_path'] = paths[0]
-                return
-        except:
-            pass
-        
-        # 手動検索
-        common_executables = [
-            r"C:\Program Files\Microsoft SDKs\Azure\CLI2\wbin\az.cmd",
-            r"C:\Program Files (x86)\Microsoft SDKs\Azure\CLI2\wbin\az.cmd",
-            f"C:\\Users\\{os.getenv('USERNAME')}\\AppData\\Local\\Programs\\Azure CLI\\wbin\\az.cmd"
-        ]
-        
-        for exe_path in common_executables:
-            if os.path.exists(exe_path):
-                print(f"   OK 手動検索で発見: {exe_path}")
-                self.az_path = exe_path
-                self.results['azure_cli_path'] = exe_path
+        # where コマンドで検索（プロセス起動が必要なため最後の手段）
+        if os.name == 'nt':
+            try:
+                result = subprocess.run(['where', 'az'], 
+                                      capture_output=True, text=True,
+                                      timeout=self._remaining_timeout(10))
+                if result.returncode == 0:
+                    paths = result.stdout.strip().split('\n')
+                    self._log(f"   OK whereコマンドで発見: {paths[0]}")
+                    self.az_path = paths[0]
+                    self.results['azure_cli_path'] = paths[0]
+                    return
+            except TimeoutError as e:
+                self._log(f"   SKIP {e}")
                 return
+            except (OSError, subprocess.SubprocessError):
+                pass
         
-        print("   NG Azure CLI実行ファイルが見つかりません")
+        self._log("   NG Azure CLI実行ファイルが見つかりません")
         self.results['azure_cli_path'] = None
     
     def test_azure_cli_version(self):
         """Azure CLI バージョンテスト"""
-        print("\n4. Azure CLI直接実行テスト")
+        self._log("\n5. Azure CLI直接実行テスト")
         
         if not self.az_path:
-            print("   SKIP Azure CLIパスが不明のためスキップ")
+            self._log("   SKIP Azure CLIパスが不明のためスキップ")
             return
         
-        try:
-            result = subprocess.run([self.az_path, '--version'], 
-                                  capture_output=True, text=True, timeout=15)
-            if result.returncode == 0:
-                print("   OK Azure CLI直接実行成功")
-                self.results['azure_cli_direct_works'] = True
-            else:
-                print(f"   NG Azure CLI直接実行失敗: {result.stderr}")
-                self.results['azure_cli_direct_works'] = False
-        except Exception as e:
-            print(f"   NG Azure CLI直接実行エラー: {e}")
+        info = self._run_az_once()
+        if info["skipped"]:
+            self._log(f"   SKIP {info['error']}")
+        elif info["ok"]:
+            self._log("   OK Azure CLI直接実行成功")
+            self.results['azure_cli_direct_works'] = True
+        else:
+            self._log(f"   NG Azure CLI直接実行失敗: {info['error']}")
             self.results['azure_cli_direct_works'] = False
     
     def check_azure_login_status(self):
         """Azure ログイン状況確認"""
-        print("\n5. Azure ログイン状況確認")
+        self._log("\n6. Azure ログイン状況確認")
         
         if not self.az_path:
-            print("   SKIP Azure CLIパスが不明のためスキップ")
+            self._log("   SKIP Azure CLIパスが不明のためスキップ")
             return
         
         try:
             result = subprocess.run([self.az_path, 'account', 'show'], 
-                                  capture_output=True, text=True, timeout=10)
+                                  capture_output=True, text=True,
+                                  timeout=self._remaining_timeout(10))
             if result.returncode == 0:
-                import json
                 account_info = json.loads(result.stdout)
                 user_name = account_info.get('user', {}).get('name', 'Unknown')
                 tenant_id = account_info.get('tenantId', 'Unknown')
-                print(f"   OK ログイン済み: {user_name}")
-                print(f"      テナントID: {tenant_id}")
+                self._log(f"   OK ログイン済み: {user_name}")
+                self._log(f"      テナントID: {tenant_id}")
                 self.results['azure_logged_in'] = True
                 self.results['azure_user'] = user_name
                 self.results['azure_tenant'] = tenant_id
             else:
-                print("   NG ログインしていません")
+                self._log("   NG ログインしていません")
                 self.results['azure_logged_in'] = False
+        except TimeoutError as e:
+            self._log(f"   SKIP {e}")
         except Exception as e:
-            print(f"   NG ログイン確認エラー: {e}")
+            self._log(f"   NG ログイン確認エラー: {e}")
             self.results['azure_logged_in'] = False
     
     def check_azure_python_sdk(self):
         """Azure Python SDK確認"""
-        print("\n6. Azure Python SDK確認")
+        self._log("\n3. Azure Python SDK確認")
         
         packages = {
             'azure.identity': 'Azure Identity SDK',
@@ -227,49 +355,51 @@ class AzureAuthDiagnostic:
             'openai': 'OpenAI Python SDK'
         }
         
+        # find_specはモジュールを実行せずに存在だけを確認する（import時の副作用・コストなし）
         for package, description in packages.items():
             try:
-                __import__(package)
-                print(f"   OK {description} インストール済み")
-                self.results[f'{package}_installed'] = True
-            except ImportError:
-                print(f"   NG {description} 未インストール")
-                self.results[f'{package}_installed'] = False
+                installed = find_spec(package) is not None
+            except ModuleNotFoundError:
+                # 親パッケージ（azure.ai 等）自体が無い場合
+                installed = False
+            
+            if installed:
+                self._log(f"   OK {description} インストール済み")
+            else:
+                self._log(f"   NG {description} 未インストール")
+            self.results[f'{package}_installed'] = installed
     
     def test_default_azure_credential(self):
         """DefaultAzureCredential テスト"""
-        print("\n7. DefaultAzureCredential テスト")
+        self._log("\n7. DefaultAzureCredential テスト")
         
         if not self.results.get('azure.identity_installed'):
-            print("   SKIP azure.identity未インストールのためスキップ")
+            self._log("   SKIP azure.identity未インストールのためスキップ")
             return
         
         try:
-            from azure.identity import DefaultAzureCredential
-            from dotenv import load_dotenv
+            identity = _load_azure_identity()
             
             # .env読み込み
-            env_path = Path(__file__).parent / ".env"
-            if env_path.exists():
-                load_dotenv(env_path, override=True)
+            _load_env_file()
             
-            print("   DefaultAzureCredential初期化中...")
-            credential = DefaultAzureCredential()
+            self._log("   DefaultAzureCredential初期化中...")
+            credential = identity.DefaultAzureCredential()
             
-            print("   認証トークン取得中...")
+            self._log("   認証トークン取得中...")
             token = credential.get_token("https://cognitiveservices.azure.com/.default")
             
             if token:
-                print("   OK DefaultAzureCredential 成功!")
+                self._log("   OK DefaultAzureCredential 成功!")
                 self.results['default_azure_credential_works'] = True
                 
                 # Azure OpenAI接続テスト
                 try:
                     from openai import AzureOpenAI
-                    from azure.identity import get_bearer_token_provider
                     
-                    token_provider = get_bearer_token_provider(
-                        DefaultAzureCredential(),
+                    # 取得済みトークンを持つ同じ資格情報を再利用する
+                    token_provider = identity.get_bearer_token_provider(
+                        credential,
                         "https://cognitiveservices.azure.com/.default"
                     )
                     
@@ -280,26 +410,24 @@ class AzureAuthDiagnostic:
                     )
                     
                     models = client.models.list()
-                    print(f"   OK Azure OpenAI 接続成功（モデル数: {len(models.data)}）")
+                    self._log(f"   OK Azure OpenAI 接続成功（モデル数: {len(models.data)}）")
                     self.results['azure_openai_connection_works'] = True
                     
                 except Exception as e:
-                    print(f"   WARN Azure OpenAI接続失敗: {e}")
+                    self._log(f"   WARN Azure OpenAI接続失敗: {e}")
                     self.results['azure_openai_connection_works'] = False
             else:
-                print("   NG トークン取得失敗")
+                self._log("   NG トークン取得失敗")
                 self.results['default_azure_credential_works'] = False
                 
         except Exception as e:
-            print(f"   NG DefaultAzureCredential エラー: {e}")
+            self._log(f"   NG DefaultAzureCredential エラー: {e}")
             self.results['default_azure_credential_works'] = False
             self.results['default_azure_credential_error'] = str(e)
     
     def print_diagnostic_summary(self):
-        """診断結果サマリー表示"""
-        print("\n" + "="*60)
-        print("診断結果サマリー")
-        print("="*60)
+        """診断結果サマリー表示（全行をまとめて1回で出力）"""
+        lines = ["", "="*60, "診断結果サマリー", "="*60]
         
         checks = [
             ("Azure CLI インストール", "azure_cli_installed"),
@@ -315,17 +443,15 @@ class AzureAuthDiagnostic:
         for check_name, key in checks:
             if key in self.results:
                 status = "OK" if self.results[key] else "NG"
-                if key == "azure_cli_path":
-                    status = "OK" if self.results[key] else "NG"
-                print(f"{check_name:<25}: {status}")
             else:
-                print(f"{check_name:<25}: SKIP")
+                status = "SKIP"
+            lines.append(f"{check_name:<25}: {status}")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
     
     def suggest_solutions(self):
-        """解決策提案"""
-        print("\n" + "="*60)
-        print("推奨解決策")
-        print("="*60)
+        """解決策提案（全行をまとめて1回で出力）"""
+        lines = ["", "="*60, "推奨解決策", "="*60]
         
         issues = []
         
@@ -389,13 +515,14 @@ class AzureAuthDiagnostic:
         # 解決策表示
         if issues:
             for i, issue in enumerate(issues, 1):
-                print(f"\n問題 {i}: {issue['problem']}")
-                print("解決策:")
-                for j, solution in enumerate(issue['solutions'], 1):
-                    print(f"  {j}. {solution}")
+                lines.append(f"\n問題 {i}: {issue['problem']}")
+                lines.append("解決策:")
+                lines.extend(f"  {j}. {solution}" for j, solution in enumerate(issue['solutions'], 1))
         else:
-            print("\nSUCCESS すべての診断項目が正常です！")
-            print("Azure認証が正常に動作しています。")
+            lines.append("\nSUCCESS すべての診断項目が正常です！")
+            lines.append("Azure認証が正常に動作しています。")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
     
     def auto_fix(self):
         """自動修復実行"""
@@ -406,8 +533,8 @@ class AzureAuthDiagnostic:
             print("Azure CLI PATHを修復中...")
             az_dir = os.path.dirname(self.az_path)
             current_path = os.environ.get('PATH', '')
-            if az_dir not in current_path:
-                os.environ['PATH'] = current_path + ';' + az_dir
+            if az_dir not in current_path.split(os.pathsep):
+                os.environ['PATH'] = current_path + os.pathsep + az_dir
                 print(f"OK PATH に追加: {az_dir}")
                 
                 # 修復後テスト
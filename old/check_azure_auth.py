@@ -6,6 +6,29 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 
+COGNITIVE_SERVICES_SCOPE = "https://cognitiveservices.azure.com/.default"
+
+# 資格情報とトークンプロバイダーはプロセス内で1つだけ作成し、各テストで共有する
+_CREDENTIAL = None
+_TOKEN_PROVIDER = None
+
+
+def _get_token_provider():
+    """
+    共有のDefaultAzureCredentialからトークンプロバイダーを取得
+    
+    プロバイダーは取得したトークンを有効期限までキャッシュするため、
+    2回目以降の呼び出しでは az などのサブプロセスが起動しない。
+    """
+    global _CREDENTIAL, _TOKEN_PROVIDER
+    
+    if _TOKEN_PROVIDER is None:
+        from azure.identity import DefaultAzureCredential, get_bearer_token_provider
+        
+        _CREDENTIAL = DefaultAzureCredential()
+        _TOKEN_PROVIDER = get_bearer_token_provider(_CREDENTIAL, COGNITIVE_SERVICES_SCOPE)
+    return _TOKEN_PROVIDER
+
 def check_azure_auth_config():
     """Azure認証設定の確認"""
     
@@ -78,13 +101,11 @@ def test_default_credential():
     print(f"\n=== DefaultAzureCredential テスト ===")
     
     try:
-        from azure.identity import DefaultAzureCredential
-        
         print("DefaultAzureCredential でテスト中...")
-        credential = DefaultAzureCredential()
+        token_provider = _get_token_provider()
         
-        # トークン取得テスト
-        token = credential.get_token("https://cognitiveservices.azure.com/.default")
+        # トークン取得テスト（取得したトークンはプロバイダー内にキャッシュされる）
+        token = token_provider()
         
         if token:
             print("OK DefaultAzureCredential 認証成功!")
@@ -118,17 +139,12 @@ def test_azure_openai_auth():
         
         # 実際にAzure OpenAIに接続テスト
         try:
-            from azure.identity import DefaultAzureCredential, get_bearer_token_provider
             from openai import AzureOpenAI
             
-            token_provider = get_bearer_token_provider(
-                DefaultAzureCredential(), 
-                "https://cognitiveservices.azure.com/.default"
-            )
-            
+            # test_default_credentialで取得済みのトークンを再利用する
             client = AzureOpenAI(
                 azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-                azure_ad_token_provider=token_provider,
+                azure_ad_token_provider=_get_token_provider(),
                 api_version="2025-04-01-preview"
             )
             
@@ -6,8 +6,15 @@ import subprocess
 import sys
 import os
 import shutil
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+COGNITIVE_SERVICES_SCOPE = "https://cognitiveservices.azure.com/.default"
+
+# 出力を取り込むだけのプローブなので、Windowsではコンソールウィンドウを作らない
+CREATE_NO_WINDOW = 0x08000000 if os.name == 'nt' else 0
+
 def debug_environment():
     """環境変数とパスの確認"""
     print("=== 環境変数デバッグ ===")
@@ -15,15 +22,22 @@ def debug_environment():
     # PATH環境変数の確認
     path_env = os.environ.get('PATH', '')
     print(f"PATH環境変数の内容:")
-    for path_item in path_env.split(';'):
-        if 'azure' in path_item.lower() or 'cli' in path_item.lower():
+    for path_item in path_env.split(os.pathsep):
+        lowered = path_item.lower()  # 各要素の小文字化は1回だけ
+        if 'azure' in lowered or 'cli' in lowered:
             print(f"  Azure関連: {path_item}")
     
     print(f"\nPython実行環境: {sys.executable}")
     print(f"現在の作業ディレクトリ: {os.getcwd()}")
 
+@functools.cache
+def _which_az():
+    """shutil.which('az') の結果（PATHを変更するまでキャッシュ）"""
+    return shutil.which('az')
+
+@functools.cache
 def find_azure_cli():
-    """Azure CLIの場所を探す"""
+    """Azure CLIの場所を探す（結果はキャッシュされ、2回目以降は検索しない）"""
     print("\n=== Azure CLI 検索 ===")
     
     # 一般的なインストール場所
@@ -37,13 +51,13 @@ def find_azure_cli():
     
     print("一般的な場所を検索中...")
     for path in common_paths:
-        if os.path.exists(path):
+        if os.path.isfile(path):
             print(f"発見: {path}")
             return path
     
     # shutil.which()で検索
     print("\nshutil.which()で検索中...")
-    az_path = shutil.which('az')
+    az_path = _which_az()
     if az_path:
         print(f"発見: {az_path}")
         return az_path
@@ -51,7 +65,8 @@ def find_azure_cli():
     # where コマンドで検索
     print("\nwhereコマンドで検索中...")
     try:
-        result = subprocess.run(['where', 'az'], capture_output=True, text=True, timeout=10)
+        result = subprocess.run(['where', 'az'], capture_output=True, text=True, timeout=10,
+                                creationflags=CREATE_NO_WINDOW)
         if result.returncode == 0:
             az_path = result.stdout.strip().split('\n')[0]
             print(f"発見: {az_path}")
@@ -94,36 +109,76 @@ def test_azure_cli_direct():
         print(f"NG Azure CLI 実行例外: {e}")
         return False
 
+def _try_command(cmd):
+    """
+    コマンドを1つ試行し、(成功可否, 表示用メッセージ) を返す
+    
+    並行実行時に出力が混ざらないよう、メッセージはまとめて返す。
+    """
+    lines = [f"テスト: {' '.join(cmd)}"]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10,
+                                creationflags=CREATE_NO_WINDOW)
+        
+        if result.returncode == 0:
+            lines.append(f"  OK 成功!")
+            lines.append(f"  バージョン: {result.stdout.split()[2] if len(result.stdout.split()) > 2 else 'Unknown'}")
+            return True, "\n".join(lines)
+        else:
+            lines.append(f"  NG 失敗: {result.stderr[:100]}")
+            
+    except FileNotFoundError:
+        lines.append(f"  NG ファイルが見つかりません")
+    except subprocess.TimeoutExpired:
+        lines.append(f"  NG タイムアウト")
+    except Exception as e:
+        lines.append(f"  NG エラー: {e}")
+    
+    return False, "\n".join(lines)
+
 def test_different_commands():
     """異なるコマンド形式でテスト"""
     print("\n=== 異なるコマンド形式テスト ===")
     
-    commands_to_try = [
-        ['az', '--version'],
-        ['az.cmd', '--version'],
-        ['az.exe', '--version'],
-        [r'C:\Program Files (x86)\Microsoft SDKs\Azure\CLI2\wbin\az.cmd', '--version'],
-        [r'C:\Program Files\Microsoft SDKs\Azure\CLI2\wbin\az.cmd', '--version'],
-    ]
+    # 検索済みのパスがあればそれを最初に試し、成功すればそこで終了する
+    az_path = find_azure_cli()
+    if az_path:
+        ok, message = _try_command([az_path, '--version'])
+        print(message)
+        if ok:
+            return az_path
     
-    for cmd in commands_to_try:
-        try:
-            print(f"テスト: {' '.join(cmd)}")
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            
-            if result.returncode == 0:
-                print(f"  OK 成功!")
-                print(f"  バージョン: {result.stdout.split()[2] if len(result.stdout.split()) > 2 else 'Unknown'}")
-                return cmd[0]  # 成功したコマンドを返す
-            else:
-                print(f"  NG 失敗: {result.stderr[:100]}")
-                
-        except FileNotFoundError:
-            print(f"  NG ファイルが見つかりません")
-        except subprocess.TimeoutExpired:
-            print(f"  NG タイムアウト")
-        except Exception as e:
-            print(f"  NG エラー: {e}")
+    # PATH上のエイリアスはwhich（PATHEXT考慮）で見つからなければ起動しても失敗するため試さない
+    commands_to_try = []
+    if _which_az():
+        commands_to_try += [
+            ['az', '--version'],
+            ['az.cmd', '--version'],
+            ['az.exe', '--version'],
+        ]
+    
+    for candidate in (
+        r'C:\Program Files (x86)\Microsoft SDKs\Azure\CLI2\wbin\az.cmd',
+        r'C:\Program Files\Microsoft SDKs\Azure\CLI2\wbin\az.cmd',
+    ):
+        if candidate != az_path:
+            commands_to_try.append([candidate, '--version'])
+    
+    if not commands_to_try:
+        return None
+    
+    # 残りの候補は並行実行し、最初に成功したものを採用（最悪時間は各タイムアウトの合計ではなく最大値）
+    executor = ThreadPoolExecutor(max_workers=len(commands_to_try))
+    futures = {executor.submit(_try_command, cmd): cmd for cmd in commands_to_try}
+    try:
+        for future in as_completed(futures):
+            ok, message = future.result()
+            print(message)
+            if ok:
+                return futures[future][0]  # 成功したコマンドを返す
+    finally:
+        # 残りの候補は待たない（未開始のものは取り消す）
+        executor.shutdown(wait=False, cancel_futures=True)
     
     return None
 
@@ -144,6 +199,9 @@ def fix_azure_cli_path():
         if az_dir not in current_path:
             print("PATHに追加中...")
             os.environ['PATH'] = current_path + ';' + az_dir
+            # PATHが変わったため検索結果のキャッシュを破棄
+            _which_az.cache_clear()
+            find_azure_cli.cache_clear()
             
             # テスト
             try:
@@ -176,7 +234,7 @@ def test_azure_auth_after_fix():
         credential = DefaultAzureCredential()
         
         # トークン取得テスト
-        token = credential.get_token("https://cognitiveservices.azure.com/.default")
+        token = credential.get_token(COGNITIVE_SERVICES_SCOPE)
         
         if token:
             print("OK Azure認証成功!")
@@ -186,9 +244,10 @@ def test_azure_auth_after_fix():
             from openai import AzureOpenAI
             from azure.identity import get_bearer_token_provider
             
+            # トークン取得済みの同じ資格情報を再利用する（認証チェーンの再探索を避ける）
             token_provider = get_bearer_token_provider(
-                DefaultAzureCredential(), 
-                "https://cognitiveservices.azure.com/.default"
+                credential,
+                COGNITIVE_SERVICES_SCOPE
             )
             
             client = AzureOpenAI(
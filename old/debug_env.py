@@ -19,26 +19,31 @@ def debug_environment():
     # .envファイルの場所を確認
     env_file = current_dir / ".env"
     print(f".envファイルの場所: {env_file}")
-    print(f".envファイルの存在: {env_file.exists()}")
     
-    if env_file.exists():
-        print(f".envファイルのサイズ: {env_file.stat().st_size} bytes")
+    # 存在確認・サイズ取得・内容読み込みを1回の読み込みで済ませる
+    try:
+        data = env_file.read_bytes()
+    except FileNotFoundError:
+        data = None
+    print(f".envファイルの存在: {data is not None}")
+    
+    if data is not None:
+        print(f".envファイルのサイズ: {len(data)} bytes")
         
         # .envファイルの内容を確認（APIキーは部分的にマスク）
         print("\n.envファイルの内容:")
-        with open(env_file, 'r', encoding='utf-8') as f:
-            for i, line in enumerate(f, 1):
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    # APIキーなどを部分的にマスク
-                    if 'API_KEY' in line or 'SECRET' in line:
-                        key, value = line.split('=', 1)
-                        masked_value = value[:10] + '*' * (len(value) - 10) if len(value) > 10 else '*' * len(value)
-                        print(f"  {i}: {key}={masked_value}")
-                    else:
-                        print(f"  {i}: {line}")
-                elif line:
+        for i, line in enumerate(data.decode('utf-8').splitlines(), 1):
+            line = line.strip()
+            if line and not line.startswith('#'):
+                # APIキーなどを部分的にマスク
+                if 'API_KEY' in line or 'SECRET' in line:
+                    key, value = line.split('=', 1)
+                    masked_value = value[:10] + '*' * (len(value) - 10) if len(value) > 10 else '*' * len(value)
+                    print(f"  {i}: {key}={masked_value}")
+                else:
                     print(f"  {i}: {line}")
+            elif line:
+                print(f"  {i}: {line}")
     
     # 明示的に.envファイルを読み込み
     print(f"\n.envファイルを読み込み中...")
@@ -91,12 +96,12 @@ def test_azure_openai_connection():
     
     print(f"\n=== Azure OpenAI接続テスト ===")
     
-    # 環境変数再読み込み
-    load_dotenv(override=True)
+    # .envはenv_configでimport時に1回だけ解析される（再読み込み・再上書きはしない）
+    from env_config import AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_API_VERSION
     
-    api_key = os.getenv("AZURE_OPENAI_API_KEY")
-    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-    api_version = os.getenv("AZURE_OPENAI_API_VERSION")
+    api_key = AZURE_OPENAI_API_KEY
+    endpoint = AZURE_OPENAI_ENDPOINT
+    api_version = AZURE_OPENAI_API_VERSION
     
     if not api_key:
         print("NG AZURE_OPENAI_API_KEY が設定されていません")
@@ -121,15 +126,26 @@ def test_azure_openai_connection():
         try:
             models = client.models.list()
             print("OK API接続成功")
-            print(f"利用可能なモデル数: {len(models.data) if hasattr(models, 'data') else 'N/A'}")
+            
+            # 件数・o3モデル有無・先頭5件を1回の走査で集計
+            data = models.data if hasattr(models, 'data') else None
+            model_count = 0
+            has_o3 = False
+            first_names = []
+            for model in data or []:
+                model_count += 1
+                if len(first_names) < 5:
+                    first_names.append(model.id)
+                if not has_o3 and 'o3' in model.id.lower():
+                    has_o3 = True
+            print(f"利用可能なモデル数: {model_count if data is not None else 'N/A'}")
             
             # o3-proモデルの確認
-            model_names = [model.id for model in (models.data if hasattr(models, 'data') else [])]
-            if any('o3' in name.lower() for name in model_names):
+            if has_o3:
                 print("OK o3モデル系が利用可能")
             else:
                 print("! o3モデル系が見つかりません")
-                print(f"利用可能なモデル: {model_names[:5]}")  # 最初の5個だけ表示
+                print(f"利用可能なモデル: {first_names}")  # 最初の5個だけ表示
             
             return True
             
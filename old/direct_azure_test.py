@@ -3,18 +3,17 @@ Azure CLI パスの問題を回避した直接認証テスト
 """
 
 import os
-from pathlib import Path
-from dotenv import load_dotenv
+
+COGNITIVE_SERVICES_SCOPE = "https://cognitiveservices.azure.com/.default"
 
 def test_azure_auth_direct():
     """Azure CLIのパス問題を回避した認証テスト"""
     print("=== 直接Azure認証テスト ===")
     
-    # .env読み込み
-    env_path = Path(__file__).parent / ".env"
-    load_dotenv(env_path, override=True)
-    
     try:
+        # .env読み込み（env_configでimport時に1回だけ解析）
+        from env_config import AZURE_OPENAI_ENDPOINT
+        
         from azure.identity import DefaultAzureCredential, get_bearer_token_provider
         from openai import AzureOpenAI
         
@@ -26,7 +25,7 @@ def test_azure_auth_direct():
         credential = DefaultAzureCredential()
         
         print("Azure認証トークンを取得中...")
-        token = credential.get_token("https://cognitiveservices.azure.com/.default")
+        token = credential.get_token(COGNITIVE_SERVICES_SCOPE)
         
         if token:
             print("OK Azure認証成功!")
@@ -34,13 +33,14 @@ def test_azure_auth_direct():
             # Azure OpenAI接続テスト
             print("Azure OpenAI 接続テスト中...")
             
+            # トークン取得済みの同じ資格情報を再利用する（認証チェーンの再探索を避ける）
             token_provider = get_bearer_token_provider(
-                DefaultAzureCredential(), 
-                "https://cognitiveservices.azure.com/.default"
+                credential,
+                COGNITIVE_SERVICES_SCOPE
             )
             
             client = AzureOpenAI(
-                azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+                azure_endpoint=AZURE_OPENAI_ENDPOINT,
                 azure_ad_token_provider=token_provider,
                 api_version="2025-04-01-preview"
             )
@@ -108,12 +108,10 @@ if __name__ == "__main__":
         print("\n SUCCESS Azure認証が正常に動作しています!")
         print("o3_pro_tester.py で Microsoft Entra ID認証を選択してください")
         
-        # .envファイルのCLIENT_ID設定を確認
-        env_path = Path(__file__).parent / ".env"
-        with open(env_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        # .envファイルのCLIENT_ID設定を確認（env_configで解析済みの値を使う）
+        from env_config import AZURE_CLIENT_ID
         
-        if "AZURE_CLIENT_ID=your-client-id" in content:
+        if AZURE_CLIENT_ID == "your-client-id":
             print("\n注意: .envファイルのCLIENT_IDをコメントアウトすることを推奨")
             print("DefaultAzureCredential（Azure CLI認証）のみで動作するため")
     else:
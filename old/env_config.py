@@ -0,0 +1,32 @@
+"""
+.env設定の共通読み込みモジュール
+
+スクリプト横の.envをimport時に1回だけ解析し、Azure OpenAIの接続設定を
+モジュール定数として公開する（各スクリプトでの再解析・再上書きを避ける）
+
+使用方法:
+    from env_config import AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_API_KEY
+"""
+
+import os
+from pathlib import Path
+from dotenv import dotenv_values
+
+ENV_PATH = Path(__file__).parent / ".env"
+
+_values = dotenv_values(ENV_PATH)
+
+# load_dotenv(override=True) と同じく.envの値を環境変数に反映する
+# （DefaultAzureCredentialなどのSDKは環境変数から設定を読むため）
+os.environ.update({key: value for key, value in _values.items() if value is not None})
+
+
+def _get(key):
+    """解析済みの.envの値を優先し、無ければ既存の環境変数を使う"""
+    return _values.get(key) or os.environ.get(key)
+
+
+AZURE_OPENAI_ENDPOINT = _get("AZURE_OPENAI_ENDPOINT")
+AZURE_OPENAI_API_KEY = _get("AZURE_OPENAI_API_KEY")
+AZURE_OPENAI_API_VERSION = _get("AZURE_OPENAI_API_VERSION")
+AZURE_CLIENT_ID = _get("AZURE_CLIENT_ID")
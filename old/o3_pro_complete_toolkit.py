@@ -13,18 +13,76 @@ Azure OpenAI o3-pro 完全版ツールキット
 - デバッグ機能
 
 使用方法:
-python o3_pro_complete_toolkit.py
+python o3_pro_complete_toolkit.py [--auth {api_key,azure_ad,auto}]
 
 作成日: 2025-01-19
 対応API: 2025-04-01-preview
 """
 
 import os
+import sys
 import json
+import argparse
 import time
+import asyncio
+import functools
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 from dotenv import load_dotenv
+from openai import AuthenticationError, BadRequestError, PermissionDeniedError
+
+# orjson（任意）: インストール済みの場合はテスト結果JSONの書き出しに使用する（C実装で高速）
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _http_client_options() -> dict:
+    """
+    同期・非同期のhttpxクライアントに共通の接続プール設定
+    
+    同じプールで全テストのTCP/TLS接続を再利用し、リクエストごとのハンドシェイクを避ける。
+    """
+    import httpx
+    
+    return {
+        "limits": httpx.Limits(
+            max_connections=20,
+            max_keepalive_connections=10,
+            keepalive_expiry=60.0
+        ),
+        "timeout": httpx.Timeout(600.0, connect=10.0)
+    }
+
+
+@functools.cache
+def _shared_token_provider():
+    """
+    プロセス内で共有するAzure ADトークンプロバイダー
+    
+    DefaultAzureCredentialは生成後の初回取得時に複数の認証情報ソースを順に試すため、
+    O3ProClientを複数生成しても資格情報の探索は1回だけにする。
+    """
+    from azure.identity import DefaultAzureCredential, get_bearer_token_provider
+    
+    return get_bearer_token_provider(
+        DefaultAzureCredential(),
+        "https://cognitiveservices.azure.com/.default"
+    )
+
+
+@functools.cache
+def _load_env(env_path: Optional[str]):
+    """
+    .envを読み込む（同じパスは初回のみ解析する）
+    
+    O3ProConfigを複数回生成してもファイルの再読み込み・再解析を行わない。
+    """
+    if env_path:
+        load_dotenv(env_path, override=True)
+    else:
+        load_dotenv(override=True)
 
 
 class O3ProConfig:
@@ -32,10 +90,7 @@ class O3ProConfig:
     
     def __init__(self, env_path: Optional[str] = None):
         """設定を初期化"""
-        if env_path:
-            load_dotenv(env_path, override=True)
-        else:
-            load_dotenv(override=True)
+        _load_env(env_path)
         
         self.api_key = os.getenv("AZURE_OPENAI_API_KEY")
         self.endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
@@ -85,13 +140,17 @@ class O3ProClient:
         self.config = config
         self.client = None
         self.auth_method = auth_method
+        self._token_provider = None  # Azure AD認証時のトークンプロバイダー（非同期クライアントと共有）
         self._initialize_client()
     
     def _initialize_client(self):
         """クライアントを初期化"""
         try:
+            import httpx
             from openai import AzureOpenAI
             
+            http_client = httpx.Client(**_http_client_options())
+            
             if self.auth_method == "api_key" or (
                 self.auth_method == "auto" and self.config.api_key
             ):
@@ -99,7 +158,8 @@ class O3ProClient:
                 self.client = AzureOpenAI(
                     api_key=self.config.api_key,
                     azure_endpoint=self.config.endpoint,
-                    api_version=self.config.api_version
+                    api_version=self.config.api_version,
+                    http_client=http_client
                 )
                 print("OK API Key認証成功")
                 
@@ -107,17 +167,13 @@ class O3ProClient:
                 self.auth_method == "auto" and self.config.has_azure_ad_config()
             ):
                 print("Azure AD認証でクライアント初期化中...")
-                from azure.identity import DefaultAzureCredential, get_bearer_token_provider
-                
-                token_provider = get_bearer_token_provider(
-                    DefaultAzureCredential(),
-                    "https://cognitiveservices.azure.com/.default"
-                )
+                self._token_provider = _shared_token_provider()
                 
                 self.client = AzureOpenAI(
                     azure_endpoint=self.config.endpoint,
-                    azure_ad_token_provider=token_provider,
-                    api_version=self.config.api_version
+                    azure_ad_token_provider=self._token_provider,
+                    api_version=self.config.api_version,
+                    http_client=http_client
                 )
                 print("OK Azure AD認証成功")
                 
@@ -132,6 +188,39 @@ class O3ProClient:
         """クライアントが使用可能かチェック"""
         return self.client is not None
     
+    def create_async_client(self):
+        """
+        同期クライアントと同じ認証方式でAsyncAzureOpenAIを生成
+        
+        呼び出し側のイベントループ内でのみ使用し、終了時にclose()すること。
+        
+        Returns:
+            AsyncAzureOpenAIインスタンス（同期クライアント未初期化時はNone）
+        """
+        if not self.is_ready():
+            return None
+        
+        import httpx
+        from openai import AsyncAzureOpenAI
+        
+        # close()時にAsyncAzureOpenAIと一緒に閉じられる
+        http_client = httpx.AsyncClient(**_http_client_options())
+        
+        if self._token_provider is not None:
+            return AsyncAzureOpenAI(
+                azure_endpoint=self.config.endpoint,
+                azure_ad_token_provider=self._token_provider,
+                api_version=self.config.api_version,
+                http_client=http_client
+            )
+        
+        return AsyncAzureOpenAI(
+            api_key=self.config.api_key,
+            azure_endpoint=self.config.endpoint,
+            api_version=self.config.api_version,
+            http_client=http_client
+        )
+    
     def test_connection(self) -> bool:
         """接続テスト"""
         if not self.is_ready():
@@ -148,110 +237,166 @@ class O3ProClient:
 
 
 class O3ProTester:
-    """o3-pro機能テストクラス"""
+    """
+    o3-pro機能テストクラス
+    
+    各テストは非同期で実行する。並行実行時に出力が混ざらないよう、
+    各テストはAPI呼び出しの完了後にまとめて結果を表示する。
+    """
+    
+    MAX_CONCURRENT_REQUESTS = 4  # 同時に発行するAPI呼び出しの上限
     
     def __init__(self, client: O3ProClient):
         """テスター初期化"""
         self.client = client
         self.deployment = client.config.deployment
+        self._async_client = None  # run_all_tests実行中のみ有効
+        self._semaphore = None
+        self._auth_error = None  # 認証エラー（401/403）が発生した場合の例外
     
-    def test_basic_reasoning(self) -> bool:
-        """基本推論テスト"""
-        print("\n=== 基本推論テスト ===")
+    async def _create(self, **params):
+        """
+        同時実行数を制限してResponses APIを呼び出す
+        
+        一度認証エラーが発生した後は、同じ結果になる残りの呼び出しを
+        API往復なしで同じ例外として失敗させる。
+        """
+        async with self._semaphore:
+            if self._auth_error is not None:
+                raise self._auth_error
+            try:
+                return await self._async_client.responses.create(**params)
+            except (AuthenticationError, PermissionDeniedError) as e:
+                self._auth_error = e
+                raise
+    
+    async def _stream_text(self, **params) -> Dict[str, Any]:
+        """
+        ストリーミングで応答を受信し、本文と初回トークンまでの時間（TTFT）を返す
         
+        差分(delta)イベントのみを連結する（test_streamingと同じ受信方法）。
+        """
+        start_time = time.time()
+        first_token_time = None
+        parts = []
+        
+        stream = await self._create(stream=True, **params)
+        async for event in stream:
+            if event.type == "response.output_text.delta":
+                delta = getattr(event, "delta", None)
+                if delta:
+                    if first_token_time is None:
+                        first_token_time = time.time()
+                    parts.append(delta)
+        
+        end_time = time.time()
+        return {
+            "response": "".join(parts),
+            "ttft": (first_token_time or end_time) - start_time,
+            "duration": end_time - start_time
+        }
+    
+    async def test_basic_reasoning(self) -> Dict[str, Any]:
+        """基本推論テスト（ストリーミングで受信し、TTFTと総所要時間を記録）"""
         try:
-            response = self.client.client.responses.create(
+            result = await self._stream_text(
                 model=self.deployment,
                 input="1+1=?",
                 reasoning={"effort": "low"}
             )
             
-            result = response.output_text
+            print("\n=== 基本推論テスト ===")
             print(f"質問: 1+1=?")
-            print(f"回答: {result}")
-            print("OK 基本推論成功")
-            return True
+            print(f"回答: {result['response']}")
+            print(f"OK 基本推論成功（初回トークン: {result['ttft']:.1f}秒 / 全体: {result['duration']:.1f}秒）")
+            return {"success": True, **result}
             
         except Exception as e:
+            print("\n=== 基本推論テスト ===")
             print(f"NG 基本推論失敗: {e}")
-            return False
+            return {"success": False, "error": str(e)}
     
-    def test_reasoning_levels(self) -> Dict[str, Any]:
-        """推論レベル別テスト"""
-        print("\n=== 推論レベル別テスト ===")
-        
+    async def _one_level(self, level: str, question: str) -> Dict[str, Any]:
+        """1つの推論レベルでAPIを呼び出し、所要時間付きの結果を返す"""
+        try:
+            start_time = time.time()
+            
+            response = await self._create(
+                model=self.deployment,
+                input=question,
+                reasoning={"effort": level}
+            )
+            
+            return {
+                "success": True,
+                "response": response.output_text,
+                "duration": time.time() - start_time
+            }
+            
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "duration": 0
+            }
+    
+    async def test_reasoning_levels(self) -> Dict[str, Any]:
+        """推論レベル別テスト（各レベルは互いに独立しているため並行実行）"""
         question = "97は素数ですか？理由も教えてください。"
         levels = ["low", "medium", "high"]
-        results = {}
         
-        for level in levels:
-            try:
-                print(f"\n{level.upper()}レベルテスト中...")
-                start_time = time.time()
-                
-                response = self.client.client.responses.create(
-                    model=self.deployment,
-                    input=question,
-                    reasoning={"effort": level}
-                )
-                
-                duration = time.time() - start_time
-                result_text = response.output_text
-                
-                results[level] = {
-                    "success": True,
-                    "response": result_text,
-                    "duration": duration
-                }
-                
-                print(f"OK {level.upper()}レベル成功（{duration:.1f}秒）")
-                print(f"回答: {result_text[:100]}...")
-                
-            except Exception as e:
-                print(f"NG {level.upper()}レベル失敗: {e}")
-                results[level] = {
-                    "success": False,
-                    "error": str(e),
-                    "duration": 0
-                }
+        level_results = await asyncio.gather(
+            *(self._one_level(level, question) for level in levels)
+        )
+        results = dict(zip(levels, level_results))
+        
+        print("\n=== 推論レベル別テスト ===")
+        for level, result in results.items():
+            if result["success"]:
+                print(f"OK {level.upper()}レベル成功（{result['duration']:.1f}秒）")
+                print(f"回答: {result['response'][:100]}...")
+            else:
+                print(f"NG {level.upper()}レベル失敗: {result['error']}")
         
         return results
     
-    def test_streaming(self) -> bool:
+    async def test_streaming(self) -> bool:
         """ストリーミングテスト"""
         print("\n=== ストリーミングテスト ===")
         
         try:
             print("ストリーミング開始...")
             
-            stream = self.client.client.responses.create(
+            stream = await self._create(
                 model=self.deployment,
                 input="日本の首都について簡潔に教えてください",
                 reasoning={"effort": "low"},
                 stream=True
             )
             
-            full_response = ""
+            response_length = 0
             chunk_count = 0
             
-            for chunk in stream:
+            # o3-proのストリーミングAPIはイベントベース
+            # 累積テキストを再結合する output_text は参照せず、差分(delta)のみ使用する
+            async for event in stream:
                 chunk_count += 1
-                if hasattr(chunk, 'output_text'):
-                    print(chunk.output_text, end='', flush=True)
-                    full_response += chunk.output_text
+                if event.type == "response.output_text.delta":
+                    chunk_text = getattr(event, "delta", None)
+                    if chunk_text is not None:
+                        print(chunk_text, end='', flush=True)
+                        response_length += len(chunk_text)
             
             print()  # 改行
-            print(f"OK ストリーミング成功（チャンク数: {chunk_count}）")
+            print(f"OK ストリーミング成功（チャンク数: {chunk_count}, 応答文字数: {response_length}）")
             return True
             
         except Exception as e:
             print(f"NG ストリーミング失敗: {e}")
             return False
     
-    def test_error_scenarios(self) -> Dict[str, Any]:
+    async def test_error_scenarios(self) -> Dict[str, Any]:
         """エラーシナリオテスト"""
-        print("\n=== エラーシナリオテスト ===")
-        
         scenarios = {
             "invalid_effort": {
                 "params": {
@@ -272,66 +417,121 @@ class O3ProTester:
         }
         
         results = {}
+        lines = ["\n=== エラーシナリオテスト ==="]
         
         for scenario_name, scenario_data in scenarios.items():
             try:
-                print(f"\n{scenario_name}テスト中...")
-                
-                response = self.client.client.responses.create(
-                    **scenario_data["params"]
-                )
+                response = await self._create(**scenario_data["params"])
+                result_text = response.output_text
                 
                 if scenario_data["expect_error"]:
-                    print(f"WARN {scenario_name}: エラーが期待されましたが成功しました")
+                    lines.append(f"WARN {scenario_name}: エラーが期待されましたが成功しました")
                     results[scenario_name] = {
                         "success": True,
                         "unexpected": True,
-                        "response": response.output_text
+                        "response": result_text
                     }
                 else:
-                    print(f"OK {scenario_name}: 正常に成功")
+                    lines.append(f"OK {scenario_name}: 正常に成功")
                     results[scenario_name] = {
                         "success": True,
-                        "response": response.output_text
+                        "response": result_text
                     }
                     
             except Exception as e:
                 if scenario_data["expect_error"]:
-                    print(f"OK {scenario_name}: 期待通りエラー発生")
+                    lines.append(f"OK {scenario_name}: 期待通りエラー発生")
                     results[scenario_name] = {
                         "success": True,
                         "expected_error": True,
                         "error": str(e)
                     }
                 else:
-                    print(f"NG {scenario_name}: 予期しないエラー")
+                    lines.append(f"NG {scenario_name}: 予期しないエラー")
                     results[scenario_name] = {
                         "success": False,
                         "error": str(e)
                     }
         
+        print("\n".join(lines))
         return results
+    
+    async def run_all_tests(self) -> Dict[str, Any]:
+        """
+        全テストを実行し、テスト名 → 結果の辞書を返す
+        
+        互いに独立したテストは並行実行する。ストリーミングテストは応答を
+        逐次表示するため、他のテストの出力と混ざらないよう最後に単独で実行する。
+        """
+        self._semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+        self._async_client = self.client.create_async_client()
+        self._auth_error = None
+        
+        try:
+            basic, levels, error_scenarios = await asyncio.gather(
+                self.test_basic_reasoning(),
+                self.test_reasoning_levels(),
+                self.test_error_scenarios()
+            )
+            streaming = await self.test_streaming()
+        finally:
+            await self._async_client.close()
+            self._async_client = None
+        
+        return {
+            "basic_reasoning": basic,
+            "reasoning_levels": {"levels": levels},
+            "streaming": streaming,
+            "error_scenarios": error_scenarios
+        }
+
+
+def _is_reasoning_summary_error(error: BadRequestError) -> bool:
+    """reasoning.summary 非対応エラーかどうかを判定"""
+    code = getattr(error, "code", None)
+    if not code and isinstance(error.body, dict):
+        code = (error.body.get("error") or {}).get("code")
+    if code == "reasoning_summary_unsupported":
+        return True
+    return "reasoning.summary" in (error.message or "")
 
 
 def create_safe_response(client, **kwargs) -> Optional[Any]:
     """
     安全なAPI呼び出し関数
     一般的なエラーを自動修正してリトライ
+    
+    BadRequestError のみを捕捉し、それ以外の例外はそのまま伝播させる
     """
     try:
         return client.responses.create(**kwargs)
-    except Exception as e:
-        error_str = str(e)
-        
+    except BadRequestError as e:
         # reasoning.summary エラーの自動修正
-        if "reasoning.summary" in error_str:
-            print("reasoning.summaryエラーを検出、encrypted_contentに変更してリトライ...")
-            kwargs['include'] = ["reasoning.encrypted_content"]
-            kwargs['store'] = False
-            return client.responses.create(**kwargs)
+        if not _is_reasoning_summary_error(e):
+            raise
         
-        # その他のエラーは再発生
-        raise e
+        print("reasoning.summaryエラーを検出、encrypted_contentに変更してリトライ...")
+        kwargs['include'] = ["reasoning.encrypted_content"]
+        kwargs['store'] = False
+        return client.responses.create(**kwargs)
+
+
+def _json_default(obj):
+    """JSONで表現できない値の変換（SDKのモデルはmodel_dump、その他は属性辞書か文字列）"""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if hasattr(obj, "__dict__"):
+        return obj.__dict__
+    return str(obj)
+
+
+def _write_results(path: Path, results: Dict[str, Any]):
+    """テスト結果をJSONで保存（インデント2・非ASCIIはそのまま、出力形式はどちらでも同じ）"""
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(results, default=_json_default, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False, default=_json_default)
 
 
 def print_summary(test_results: Dict[str, Any]):
@@ -378,8 +578,14 @@ def print_summary(test_results: Dict[str, Any]):
         print("WARNING 失敗したテストがあります")
 
 
-def main():
-    """メイン実行関数"""
+def main(auth_method: Optional[str] = None):
+    """
+    メイン実行関数
+    
+    Args:
+        auth_method: 認証方法 ("api_key", "azure_ad", "auto")。
+                     省略時は端末からの実行なら対話で選択し、それ以外（CI等）は "auto"
+    """
     print("Azure OpenAI o3-pro 完全版ツールキット")
     print("="*50)
     
@@ -392,21 +598,24 @@ def main():
         print("\nERROR 設定が不正です。.envファイルを確認してください")
         return
     
-    # 認証方法選択
-    print("\n認証方法を選択してください:")
-    print("1. API Key認証（推奨）")
-    print("2. Azure AD認証")
-    print("3. 自動選択")
-    
-    choice = input("選択 (1-3, Enter=3): ").strip() or "3"
-    
-    auth_methods = {
-        "1": "api_key",
-        "2": "azure_ad", 
-        "3": "auto"
-    }
-    
-    auth_method = auth_methods.get(choice, "auto")
+    # 認証方法選択（指定が無く、標準入力が端末の場合のみ対話で選ぶ）
+    if auth_method is None and sys.stdin.isatty():
+        print("\n認証方法を選択してください:")
+        print("1. API Key認証（推奨）")
+        print("2. Azure AD認証")
+        print("3. 自動選択")
+        
+        choice = input("選択 (1-3, Enter=3): ").strip() or "3"
+        
+        auth_methods = {
+            "1": "api_key",
+            "2": "azure_ad", 
+            "3": "auto"
+        }
+        
+        auth_method = auth_methods.get(choice, "auto")
+    elif auth_method is None:
+        auth_method = "auto"
     
     # クライアント初期化
     client = O3ProClient(config, auth_method)
@@ -420,25 +629,12 @@ def main():
         print("\nERROR 接続テストに失敗しました")
         return
     
-    # テスト実行
+    # テスト実行（独立したテストは並行実行）
     tester = O3ProTester(client)
-    test_results = {}
     
     print("\nテストを開始します...")
     
-    # 基本推論テスト
-    test_results["basic_reasoning"] = tester.test_basic_reasoning()
-    
-    # 推論レベル別テスト
-    test_results["reasoning_levels"] = {
-        "levels": tester.test_reasoning_levels()
-    }
-    
-    # ストリーミングテスト
-    test_results["streaming"] = tester.test_streaming()
-    
-    # エラーシナリオテスト
-    test_results["error_scenarios"] = tester.test_error_scenarios()
+    test_results = asyncio.run(tester.run_all_tests())
     
     # 結果サマリー表示
     print_summary(test_results)
@@ -446,12 +642,15 @@ def main():
     # 結果をJSONファイルに保存
     result_file = Path(__file__).parent / "test_results.json"
     try:
-        with open(result_file, 'w', encoding='utf-8') as f:
-            json.dump(test_results, f, indent=2, ensure_ascii=False, default=str)
+        _write_results(result_file, test_results)
         print(f"\nテスト結果を保存しました: {result_file}")
     except Exception as e:
         print(f"結果保存エラー: {e}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Azure OpenAI o3-pro 完全版ツールキット")
+    parser.add_argument("--auth", choices=["api_key", "azure_ad", "auto"],
+                        help="認証方法（省略時は端末なら対話で選択、それ以外は auto）")
+    args = parser.parse_args()
+    main(auth_method=args.auth)
\ No newline at end of file
@@ -3,14 +3,42 @@ o3-pro 成功例デモ
 先ほどのテスト結果から、動作する機能のみを抽出したシンプルなデモ
 """
 
-import os
-from pathlib import Path
-from dotenv import load_dotenv
-from openai import AzureOpenAI
+import sys
+import time
+import functools
+from concurrent.futures import ThreadPoolExecutor
 
-# .envファイルの読み込み
-env_path = Path(__file__).parent / ".env"
-load_dotenv(env_path, override=True)
+# .envファイルの読み込み（env_configでimport時に1回だけ解析）
+from env_config import AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT
+
+# 複雑な推論タスクで使う論理問題
+_LOGIC_PUZZLE = """
+        以下の論理問題を解いてください：
+        
+        3人の学生（A、B、C）がいます。
+        - Aは真実しか言わない
+        - Bは嘘しか言わない  
+        - Cは時々真実、時々嘘を言う
+        
+        今日、3人が以下のように言いました：
+        A: "Bは嘘つきです"
+        B: "Cは正直者です"
+        C: "私は嘘つきではありません"
+        
+        誰が何を言ったか分析してください。
+        """
+
+@functools.cache
+def _get_client():
+    """デモ全体で共有するクライアント（HTTP接続プールを再利用）"""
+    # 環境変数チェックで終了する場合にSDKの読み込みコストを払わないよう、ここで読み込む
+    from openai import AzureOpenAI
+    
+    return AzureOpenAI(
+        api_key=AZURE_OPENAI_API_KEY,
+        azure_endpoint=AZURE_OPENAI_ENDPOINT,
+        api_version="2025-04-01-preview"
+    )
 
 def basic_o3_demo():
     """基本的なo3-pro動作デモ"""
@@ -18,11 +46,7 @@ def basic_o3_demo():
     print("=== o3-pro 基本動作デモ ===\n")
     
     # クライアント作成
-    client = AzureOpenAI(
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-        api_version="2025-04-01-preview"
-    )
+    client = _get_client()
     
     print("OK クライアント初期化成功")
     
@@ -56,14 +80,23 @@ def basic_o3_demo():
     print("\n2. 推論努力レベル比較")
     problem = "なぜ人間は夢を見るのか、科学的に説明してください。"
     
-    for effort in ["low", "medium", "high"]:
-        print(f"\n--- 努力レベル: {effort} ---")
-        try:
-            response = client.responses.create(
+    # 3レベルは互いに独立しているため並行実行し、結果はレベル順に表示
+    efforts = ["low", "medium", "high"]
+    with ThreadPoolExecutor(max_workers=len(efforts)) as executor:
+        futures = {
+            effort: executor.submit(
+                client.responses.create,
                 model="O3-pro",
                 input=problem,
                 reasoning={"effort": effort}
             )
+            for effort in efforts
+        }
+    
+    for effort, future in futures.items():
+        print(f"\n--- 努力レベル: {effort} ---")
+        try:
+            response = future.result()
             # 最初の200文字だけ表示
             preview = response.output_text[:200] + "..." if len(response.output_text) > 200 else response.output_text
             print(f"OK 回答: {preview}")
@@ -83,11 +116,28 @@ def basic_o3_demo():
             stream=True
         )
         
+        # 差分テキストはresponse.output_text.deltaイベントのdelta（文字列）で届く
+        # 端末への書き込みは64文字または50ミリ秒ごとにまとめる
+        write = sys.stdout.write
+        buffer = []
+        buffered = 0
+        last_flush = time.monotonic()
         for event in stream:
-            if hasattr(event, 'delta') and hasattr(event.delta, 'content'):
-                if event.delta.content:
-                    print(event.delta.content, end="", flush=True)
-        
+            if event.type == "response.output_text.delta":
+                delta = getattr(event, "delta", None)
+                if delta:
+                    buffer.append(delta)
+                    buffered += len(delta)
+                    now = time.monotonic()
+                    if buffered >= 64 or now - last_flush >= 0.05:
+                        write("".join(buffer))
+                        sys.stdout.flush()
+                        buffer.clear()
+                        buffered = 0
+                        last_flush = now
+        
+        # 残りを書き出す
+        write("".join(buffer))
         print("\nOK ストリーミング完了")
         
     except Exception as e:
@@ -96,25 +146,9 @@ def basic_o3_demo():
     # 複雑な推論（修正版・動作確認済み）
     print("\n4. 複雑な推論タスク")
     try:
-        complex_task = """
-        以下の論理問題を解いてください：
-        
-        3人の学生（A、B、C）がいます。
-        - Aは真実しか言わない
-        - Bは嘘しか言わない  
-        - Cは時々真実、時々嘘を言う
-        
-        今日、3人が以下のように言いました：
-        A: "Bは嘘つきです"
-        B: "Cは正直者です"
-        C: "私は嘘つきではありません"
-        
-        誰が何を言ったか分析してください。
-        """
-        
         response = client.responses.create(
             model="O3-pro",
-            input=complex_task,
+            input=_LOGIC_PUZZLE,
             reasoning={"effort": "medium"},
             include=["reasoning.encrypted_content"],
             store=False
@@ -129,11 +163,7 @@ def test_background_processing():
     
     print("\n=== バックグラウンド処理テスト ===")
     
-    client = AzureOpenAI(
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-        api_version="2025-04-01-preview"
-    )
+    client = _get_client()
     
     try:
         print("長時間タスクを開始...")
@@ -148,12 +178,17 @@ def test_background_processing():
         print(f"タスクID: {response.id}")
         print("処理状況を監視中...")
         
-        import time
-        for i in range(10):  # 最大10回チェック
-            time.sleep(3)  # 3秒待機
+        # 指数バックオフで確認（1, 2, 4, ... 最大30秒間隔、全体で最大90秒）
+        delay = 1.0
+        deadline = time.monotonic() + 90
+        check_count = 0
+        while time.monotonic() < deadline:
+            time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+            delay = min(delay * 2, 30)
+            check_count += 1
             
             status = client.responses.retrieve(response.id)
-            print(f"  チェック {i+1}: {getattr(status, 'status', 'unknown')}")
+            print(f"  チェック {check_count}: {getattr(status, 'status', 'unknown')}")
             
             if hasattr(status, 'status'):
                 if status.status == "completed":
@@ -173,7 +208,7 @@ def test_background_processing():
 
 if __name__ == "__main__":
     # 環境変数確認
-    if not os.getenv("AZURE_OPENAI_API_KEY") or not os.getenv("AZURE_OPENAI_ENDPOINT"):
+    if not AZURE_OPENAI_API_KEY or not AZURE_OPENAI_ENDPOINT:
         print("NG 環境変数が設定されていません")
         print("AZURE_OPENAI_API_KEY と AZURE_OPENAI_ENDPOINT を設定してください")
         exit(1)
@@ -3,36 +3,23 @@
 仮想環境の問題を回避し、直接テストを実行
 """
 
-import os
 import sys
-from pathlib import Path
 
 # .envファイルの読み込み
 try:
-    from dotenv import load_dotenv
-    env_path = Path(__file__).parent / ".env"
-    load_dotenv(env_path, override=True)
-    print(f".envファイル読み込み完了: {env_path}")
+    from env_config import ENV_PATH, AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_API_KEY
+    print(f".envファイル読み込み完了: {ENV_PATH}")
 except ImportError:
     print("python-dotenvがインストールされていません")
     print("pip install python-dotenv を実行してください")
     sys.exit(1)
 
-# OpenAI SDKのインポート
-try:
-    from openai import AzureOpenAI
-    print("OpenAI SDK読み込み完了")
-except ImportError:
-    print("openaiがインストールされていません")
-    print("pip install openai>=1.68.0 を実行してください")
-    sys.exit(1)
-
 def test_o3_pro():
     """o3-proの簡単なテスト"""
     
     # 環境変数確認
-    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-    api_key = os.getenv("AZURE_OPENAI_API_KEY")
+    endpoint = AZURE_OPENAI_ENDPOINT
+    api_key = AZURE_OPENAI_API_KEY
     
     print(f"\n環境変数の状態:")
     print(f"  エンドポイント: {'設定済み' if endpoint else '未設定'}")
@@ -45,6 +32,15 @@ def test_o3_pro():
     
     print(f"\nエンドポイント: {endpoint}")
     
+    # OpenAI SDKのインポート（環境変数の確認後に読み込み、早期終了時の起動コストを避ける）
+    try:
+        from openai import AzureOpenAI
+        print("OpenAI SDK読み込み完了")
+    except ImportError:
+        print("openaiがインストールされていません")
+        print("pip install openai>=1.68.0 を実行してください")
+        sys.exit(1)
+    
     # クライアント作成
     try:
         client = AzureOpenAI(
@@ -4,109 +4,156 @@
 """
 
 import os
+import re
+import sys
+import argparse
 from pathlib import Path
 
-def main():
+# 整理対象の定義（変更されない設定値のためモジュール定数として1回だけ構築）
+
+# 最終的に必要なファイル
+_ESSENTIAL_FILES = {
+    "README_O3PRO_COMPLETE.md": "完全ガイドドキュメント",
+    "o3_pro_complete_toolkit.py": "完全版ツールキット", 
+    "o3_pro_simple_demo.py": "動作確認済みデモ",
+    "azure_auth_troubleshoot.py": "Azure認証診断ツール",
+    "requirements.txt": "依存関係",
+    "CLAUDE.md": "プロジェクト設定",
+    ".env": "環境変数（ユーザー作成）"
+}
+
+# 重要だが必須ではないファイル
+_OPTIONAL_FILES = {
+    "README.md": "元のREADME",
+    ".gitignore": "Git設定",
+    ".env.example": "環境変数サンプル"
+}
+
+# 移動対象（不要な途中ファイル）
+_FILES_TO_ARCHIVE = (
+    "azure_cli_setup.py",
+    "check_azure_auth.py", 
+    "debug_azure_cli.py",
+    "debug_env.py",
+    "direct_azure_test.py",
+    "fix_azure_path.ps1",
+    "install_azure_cli.ps1",
+    "organize_files.ps1",
+    "test_failed_parts.py",
+    "quick_test_o3.py", 
+    "simple_o3_test.py",
+    "run_test.bat",
+    "run_test.ps1",
+    "move_files.bat",
+    "organize_project.py",
+    "simple_cleanup.py",
+    "=1.68.0"
+)
+
+# 移動対象フォルダ
+_FOLDERS_TO_ARCHIVE = ("src", "tests", "examples")
+
+# テスト結果JSON（o3_pro_test_results_*.json）の判定用（パターン追加時はここに連結する）
+_JSON_RE = re.compile(r"o3_pro_test_results_.*\.json\Z")
+
+def main(apply=False):
+    """
+    整理状況を表示する
+    
+    Args:
+        apply: Trueの場合、移動対象ファイルを実際にoldフォルダへ移動する
+               （既定は表示のみのドライラン）
+    """
     print("=== プロジェクト整理状況 ===")
     
     base_dir = Path(__file__).parent
     
-    # 最終的に必要なファイル
-    essential_files = {
-        "README_O3PRO_COMPLETE.md": "完全ガイドドキュメント",
-        "o3_pro_complete_toolkit.py": "完全版ツールキット", 
-        "o3_pro_simple_demo.py": "動作確認済みデモ",
-        "azure_auth_troubleshoot.py": "Azure認証診断ツール",
-        "requirements.txt": "依存関係",
-        "CLAUDE.md": "プロジェクト設定",
-        ".env": "環境変数（ユーザー作成）"
-    }
-    
-    # 重要だが必須ではないファイル
-    optional_files = {
-        "README.md": "元のREADME",
-        ".gitignore": "Git設定",
-        ".env.example": "環境変数サンプル"
-    }
-    
-    # 移動対象（不要な途中ファイル）
-    files_to_archive = [
-        "azure_cli_setup.py",
-        "check_azure_auth.py", 
-        "debug_azure_cli.py",
-        "debug_env.py",
-        "direct_azure_test.py",
-        "fix_azure_path.ps1",
-        "install_azure_cli.ps1",
-        "organize_files.ps1",
-        "test_failed_parts.py",
-        "quick_test_o3.py", 
-        "simple_o3_test.py",
-        "run_test.bat",
-        "run_test.ps1",
-        "move_files.bat",
-        "organize_project.py",
-        "simple_cleanup.py",
-        "=1.68.0"
-    ]
+    # ディレクトリを1回だけ走査し、存在確認はすべて集合の所属判定で行う
+    # テスト結果JSON（o3_pro_test_results_*.json）も同じ走査で拾う
+    files = set()
+    dirs = set()
+    json_files = []
+    with os.scandir(base_dir) as entries:
+        for entry in entries:
+            if entry.is_file():
+                files.add(entry.name)
+                if _JSON_RE.match(entry.name):
+                    json_files.append(entry.name)
+            elif entry.is_dir():
+                dirs.add(entry.name)
     
-    # JSON結果ファイル
-    json_pattern = "o3_pro_test_results_*.json"
+    # 各セクションは行をまとめて組み立て、1回のwriteで出力する
+    sys.stdout.write("\n必須ファイル状況:\n" + "".join(
+        f"  {'OK' if file_name in files else 'NG'} {file_name} - {description}\n"
+        for file_name, description in _ESSENTIAL_FILES.items()
+    ))
     
-    print("\n必須ファイル状況:")
-    for file_name, description in essential_files.items():
-        file_path = base_dir / file_name
-        exists = "OK" if file_path.exists() else "NG"
-        print(f"  {exists} {file_name} - {description}")
+    sys.stdout.write("\nオプションファイル状況:\n" + "".join(
+        f"  {'OK' if file_name in files else '--'} {file_name} - {description}\n"
+        for file_name, description in _OPTIONAL_FILES.items()
+    ))
     
-    print("\nオプションファイル状況:")
-    for file_name, description in optional_files.items():
-        file_path = base_dir / file_name
-        exists = "OK" if file_path.exists() else "--"
-        print(f"  {exists} {file_name} - {description}")
-    
-    print("\n移動対象ファイル:")
-    existing_archive_files = []
-    for file_name in files_to_archive:
-        file_path = base_dir / file_name
-        if file_path.exists():
-            existing_archive_files.append(file_name)
-            print(f"  - {file_name}")
+    existing_archive_files = [file_name for file_name in _FILES_TO_ARCHIVE if file_name in files]
+    sys.stdout.write("\n移動対象ファイル:\n" + "".join(
+        f"  - {file_name}\n" for file_name in existing_archive_files
+    ))
     
     # JSONファイル
-    json_files = list(base_dir.glob(json_pattern))
     if json_files:
-        print(f"\nテスト結果ファイル ({len(json_files)}個):")
-        for json_file in json_files:
-            print(f"  - {json_file.name}")
+        sys.stdout.write(f"\nテスト結果ファイル ({len(json_files)}個):\n" + "".join(
+            f"  - {json_file}\n" for json_file in json_files
+        ))
     
     # フォルダ
-    folders_to_archive = ["src", "tests", "examples"]
-    existing_folders = []
-    for folder_name in folders_to_archive:
-        folder_path = base_dir / folder_name
-        if folder_path.exists():
-            existing_folders.append(folder_name)
+    existing_folders = [folder_name for folder_name in _FOLDERS_TO_ARCHIVE if folder_name in dirs]
     
     if existing_folders:
-        print(f"\n移動対象フォルダ:")
-        for folder_name in existing_folders:
-            print(f"  - {folder_name}/")
+        sys.stdout.write("\n移動対象フォルダ:\n" + "".join(
+            f"  - {folder_name}/\n" for folder_name in existing_folders
+        ))
     
-    # 現在のメインディレクトリファイル数
-    all_files = [f for f in base_dir.iterdir() if f.is_file()]
-    print(f"\n現在のメインディレクトリファイル数: {len(all_files)}")
+    # 現在のメインディレクトリファイル数（走査済みの集合を使い、再走査しない）
+    print(f"\n現在のメインディレクトリファイル数: {len(files)}")
     print(f"移動対象ファイル数: {len(existing_archive_files) + len(json_files)}")
     print(f"移動対象フォルダ数: {len(existing_folders)}")
     
     # 整理後の予想
-    remaining_files = len(all_files) - len(existing_archive_files) - len(json_files)
+    remaining_files = len(files) - len(existing_archive_files) - len(json_files)
     print(f"整理後の予想ファイル数: {remaining_files}")
     
-    print("\n次のステップ:")
-    print("1. 手動でoldフォルダにファイル移動")
-    print("2. または以下のコマンドを実行:")
-    print("   for file in $(ls | grep -E '(azure_cli_setup|check_azure|debug_|direct_|fix_|install_|organize|test_failed|quick_test|simple_o3|run_test|move_files|=1.68.0)'); do mv \"$file\" old/; done")
+    if not apply:
+        print("\n次のステップ:")
+        print("1. 手動でoldフォルダにファイル移動")
+        print("2. または --apply オプション付きで再実行してください:")
+        print("   python simple_cleanup.py --apply")
+        return
+    
+    # 走査済みの名前をそのまま使い、同一ファイルシステム内のリネームで移動する（再走査・コピーなし）
+    archive_dir = base_dir / "old"
+    archive_dir.mkdir(exist_ok=True)
+    
+    print(f"\n{archive_dir} へ移動中...")
+    moved = 0
+    skipped = 0
+    for name in existing_archive_files + json_files:
+        destination = archive_dir / name
+        if destination.exists():
+            # os.replaceは移動先を上書きするため、既存のアーカイブは残して移動しない
+            print(f"  WARN {name}: {archive_dir} に同名ファイルがあるためスキップ")
+            skipped += 1
+            continue
+        try:
+            os.replace(base_dir / name, destination)
+            moved += 1
+        except OSError as e:
+            print(f"  NG {name}: {e}")
+    print(f"OK {moved}個のファイルを移動しました")
+    if skipped:
+        print(f"WARN {skipped}個のファイルは同名ファイルが既にあるため移動していません")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="プロジェクト整理状況の表示とファイル移動")
+    parser.add_argument("--apply", action="store_true",
+                        help="移動対象ファイルを実際にoldフォルダへ移動する（既定はドライラン）")
+    args = parser.parse_args()
+    main(apply=args.apply)
@@ -12,6 +12,9 @@ from openai import AzureOpenAI
 env_file = Path(__file__).parent / ".env"
 load_dotenv(env_file, override=True)
 
+# 再試行するデプロイメント名の候補
+_DEPLOYMENT_VARIANTS = ("o3-pro", "O3-pro", "o3pro", "O3pro")
+
 def test_basic_connection():
     """基本的な接続テスト"""
     print("=== シンプルなo3-pro接続テスト ===\n")
@@ -82,8 +85,13 @@ def test_basic_connection():
             # まずは一般的なモデルで試す
             available_models = ["gpt-4o", "gpt-4", "gpt-35-turbo"]
             
+            # 完全一致は集合で判定し、部分一致は改行区切りで連結した1つの文字列に対して1回で判定
+            # （モデル名は改行を含まないため、名前をまたいだ誤一致は起きない）
+            model_set = set(model_names)
+            model_blob = "\n".join(model_names)
+            
             for model in available_models:
-                if model in model_names or any(model in name for name in model_names):
+                if model in model_set or model in model_blob:
                     try:
                         response = client.responses.create(
                             model=model,
@@ -119,20 +127,25 @@ def test_basic_connection():
             print(f"o3-pro失敗: {e}")
             
             # デプロイメント名のバリエーションを試す
-            variations = ["o3-pro", "O3-pro", "o3pro", "O3pro"]
-            for variant in variations:
-                if variant != deployment_name:
-                    try:
-                        print(f"  {variant}で再試行中...")
-                        response = client.responses.create(
-                            model=variant,
-                            input="テスト",
-                            reasoning={"effort": "low"}
-                        )
-                        print(f"OK {variant}で成功!")
-                        return True
-                    except Exception as e2:
-                        print(f"  {variant}も失敗: {e2}")
+            # Azureのデプロイメント名は大文字小文字を区別しないため、大小違いは試行済みとみなす
+            tried = {deployment_name.lower()}
+            for variant in _DEPLOYMENT_VARIANTS:
+                variant_lower = variant.lower()
+                if variant_lower in tried:
+                    continue
+                tried.add(variant_lower)
+                
+                try:
+                    print(f"  {variant}で再試行中...")
+                    response = client.responses.create(
+                        model=variant,
+                        input="テスト",
+                        reasoning={"effort": "low"}
+                    )
+                    print(f"OK {variant}で成功!")
+                    return True
+                except Exception as e2:
+                    print(f"  {variant}も失敗: {e2}")
             
             return False
         
@@ -151,12 +164,12 @@ def test_with_different_endpoints():
         print("基本的な環境変数が設定されていません")
         return
     
-    # 異なるエンドポイント形式を試す
-    endpoint_variations = [
+    # 異なるエンドポイント形式を試す（同一文字列は1回だけ、順序は維持）
+    endpoint_variations = list(dict.fromkeys([
         base_endpoint,
         base_endpoint.rstrip('/'),
         base_endpoint + ('/' if not base_endpoint.endswith('/') else '')
-    ]
+    ]))
     
     for i, endpoint in enumerate(endpoint_variations, 1):
         print(f"\n{i}. エンドポイント: {endpoint}")
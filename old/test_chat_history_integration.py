@@ -73,13 +73,6 @@ def test_chat_history_with_api():
         for i, question in enumerate(test_questions, 1):
             print(f"\n=== 質問 {i}: {question} ===")
             
-            # ユーザーメッセージを履歴に追加
-            if not history_manager.add_message(session_id, "user", question):
-                print(f"NG ユーザーメッセージ追加失敗")
-                return False
-            
-            print("OK ユーザーメッセージ履歴追加")
-            
             # API呼び出し実行
             result = reasoning_handler.basic_reasoning(question, effort="low")
             
@@ -90,24 +83,23 @@ def test_chat_history_with_api():
             print(f"OK API呼び出し成功（{result['duration']:.1f}秒）")
             print(f"   回答: {result['response'][:50]}...")
             
-            # アシスタント回答を履歴に追加
+            # 質問と回答を1ターン分まとめて履歴に追加（ファイル書き込みは1回）
             metadata = {
                 "mode": "reasoning",
                 "effort": "low",
                 "duration": result["duration"],
                 "api_success": True
             }
+            pending = [
+                ("user", question, None),
+                ("assistant", result["response"], metadata)
+            ]
             
-            if not history_manager.add_message(
-                session_id, 
-                "assistant", 
-                result["response"], 
-                metadata
-            ):
-                print("NG アシスタントメッセージ追加失敗")
+            if not history_manager.add_messages(session_id, pending):
+                print("NG メッセージ履歴追加失敗")
                 return False
             
-            print("OK アシスタントメッセージ履歴追加")
+            print("OK ユーザー・アシスタントメッセージ履歴追加")
         
         # 履歴検証
         print("\n=== 履歴検証 ===")
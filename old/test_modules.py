@@ -6,15 +6,17 @@
 import sys
 from pathlib import Path
 
-project_root = Path(__file__).parent
+# プロジェクトルート（old/の親）をパスに追加（core, handlersを読み込むため）
+project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+# import失敗はテスト失敗として握りつぶさず、読み込み時にそのまま報告する
+from core.azure_auth import O3ProConfig, O3ProClient
+from handlers import ReasoningHandler
+
 def test_reasoning():
     """基本推論テスト"""
     try:
-        from core.azure_auth import O3ProConfig, O3ProClient
-        from handlers import ReasoningHandler
-        
         config = O3ProConfig()
         if not config.validate():
             return False
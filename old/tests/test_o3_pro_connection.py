@@ -9,7 +9,7 @@ import pytest
 import asyncio
 from unittest.mock import patch, MagicMock
 from dotenv import load_dotenv
-from openai import AzureOpenAI
+from openai import AzureOpenAI, AsyncAzureOpenAI
 from azure.identity import DefaultAzureCredential
 
 # テスト前の設定
@@ -56,23 +56,34 @@ class TestO3ProConnection:
         not os.getenv("AZURE_OPENAI_API_KEY") or not os.getenv("AZURE_OPENAI_ENDPOINT"),
         reason="Azure OpenAI credentials not provided"
     )
-    def test_reasoning_effort_levels(self, client):
-        """推論努力レベルのテスト"""
+    @pytest.mark.asyncio
+    async def test_reasoning_effort_levels(self):
+        """推論努力レベルのテスト（3レベルを並行実行）"""
         effort_levels = ["low", "medium", "high"]
         
-        for effort in effort_levels:
-            try:
-                response = client.responses.create(
-                    model="o3-pro",
-                    input="1 + 1 = ?",
-                    reasoning={"effort": effort}
-                )
-                
-                assert hasattr(response, 'output_text')
-                assert response.output_text is not None
-                
-            except Exception as e:
-                pytest.skip(f"Effort level {effort} test failed: {e}")
+        async with AsyncAzureOpenAI(
+            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+            api_version="2025-04-01-preview"
+        ) as async_client:
+            responses = await asyncio.gather(
+                *[
+                    async_client.responses.create(
+                        model="o3-pro",
+                        input="1 + 1 = ?",
+                        reasoning={"effort": effort}
+                    )
+                    for effort in effort_levels
+                ],
+                return_exceptions=True
+            )
+        
+        for effort, response in zip(effort_levels, responses):
+            if isinstance(response, Exception):
+                pytest.skip(f"Effort level {effort} test failed: {response}")
+            
+            assert hasattr(response, 'output_text')
+            assert response.output_text is not None
     
     @pytest.mark.skipif(
         not os.getenv("AZURE_OPENAI_API_KEY") or not os.getenv("AZURE_OPENAI_ENDPOINT"),
@@ -13,9 +13,20 @@ o3-pro シンプルチャットボット
 作成日: 2025-07-19
 """
 
+import os
 import sys
+import asyncio
+import contextlib
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
 
+from dotenv import load_dotenv
+
 # プロジェクトルートをパスに追加
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
@@ -24,34 +35,144 @@ from core.azure_auth import O3ProConfig, O3ProClient
 from handlers import ReasoningHandler, StreamingHandler, BackgroundHandler
 from chat_history.local_history import ChatHistoryManager
 
-# Cosmos DB統合
+# uvloop（任意）: インストール済みの場合はCosmos DB用の常駐ループに使用する
+# Windowsでは未対応のため標準のイベントループ（ProactorEventLoop）を使う
 try:
-    from cosmos_history.config import load_config_from_env
-    from cosmos_history.cosmos_client import CosmosDBClient
-    from cosmos_history.cosmos_history_manager import CosmosHistoryManager
-    COSMOS_AVAILABLE = True
+    import uvloop
+    UVLOOP_AVAILABLE = sys.platform != "win32"
 except ImportError:
-    COSMOS_AVAILABLE = False
+    UVLOOP_AVAILABLE = False
+
+def _start_loop_thread():
+    """専用スレッドで動き続けるイベントループを起動して返す"""
+    loop = uvloop.new_event_loop() if UVLOOP_AVAILABLE else asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+
+def _history_snippet(content: str) -> str:
+    """/history 表示用の1行要約（改行除去・60文字で切り詰め）"""
+    content = content.replace('\n', ' ')
+    if len(content) > 60:
+        content = content[:60] + "..."
+    return content
+
+
+# 有効なモード・effort
+VALID_MODES = ["reasoning", "streaming", "background"]
+VALID_EFFORTS = ["low", "medium", "high"]
 
 
 class HistoryManagerWrapper:
     """Cosmos DB と ローカル履歴管理の統一インターフェース"""
     
+    # 1回のフラッシュで保存する最大メッセージ数と、バッチにまとめるための待ち時間（秒）
+    FLUSH_MAX_MESSAGES = 20
+    FLUSH_INTERVAL = 0.05
+    
+    # セッション情報・メッセージのキャッシュ有効期間（秒）
+    CACHE_TTL = 30.0
+    
+    # /history で表示する最新メッセージ件数（キャッシュもこの件数だけ保持）
+    HISTORY_TAIL = 5
+    
     def __init__(self, manager, is_cosmos=False):
         self.manager = manager
         self.is_cosmos = is_cosmos
-        self.session_mapping = {}  # Cosmos DB用のセッションID変換
+        self.session_mapping = {}  # Cosmos DB用のセッションID → 会話オブジェクト（会話の再取得を省く）
+        
+        # Cosmos DB用の常駐イベントループ
+        # 呼び出しごとにループを作り直すとHTTP接続プール・認証トークンが毎回破棄されるため、
+        # 専用スレッドで1つのループを動かし続けてコルーチンを投入する
+        self._loop = None
+        self._pending = None  # 保存待ちメッセージのキュー（常駐ループ上で作成）
+        self._flusher_task = None
+        self._last_write = None  # 最後に投入したメッセージ保存のFuture
+        
+        # Cosmos DB用のセッション別キャッシュ {session_id: (取得時刻, 値)}
+        # 履歴はこのボット自身の追加でしか変化しないため、追加時に手元で更新して再取得を省く
+        self._info_cache = {}
+        self._tail_cache = {}  # 最新HISTORY_TAIL件のみ（deque(maxlen)で会話が長くなってもO(1)）
+        if is_cosmos:
+            self._loop = _start_loop_thread()
+            self._run(self._start_flusher())
+        
+        # ローカル履歴用の書き込みスレッド
+        # JSONの読み書きを入力ループから外し、1スレッドで順に処理して保存順を保つ
+        self._writer = None
+        if not is_cosmos:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-writer")
+    
+    async def _start_flusher(self):
+        """保存キューと書き込みタスクを常駐ループ上で作成"""
+        self._pending = asyncio.Queue()
+        self._flusher_task = asyncio.create_task(self._flusher())
+    
+    async def _flusher(self):
+        """
+        保存キューを取り出し、会話ごとにまとめて一括保存する
+        
+        書き込みはこのタスクだけが行うため、追加順とシーケンス番号の採番順が一致する。
+        """
+        while True:
+            batch = [await self._pending.get()]
+            await asyncio.sleep(self.FLUSH_INTERVAL)  # 同じターンの後続メッセージを待ってまとめる
+            while len(batch) < self.FLUSH_MAX_MESSAGES and not self._pending.empty():
+                batch.append(self._pending.get_nowait())
+            
+            # 会話ごとに追加順を保ったままグループ化
+            groups = {}
+            for conversation, message, future in batch:
+                groups.setdefault(conversation.conversation_id, (conversation, []))[1].append((message, future))
+            
+            for conversation, items in groups.values():
+                try:
+                    await self.manager.add_messages_to(
+                        conversation,
+                        [message for message, _ in items]
+                    )
+                except Exception as e:
+                    print(f"⚠️ Cosmos DBメッセージ追加エラー: {e}")
+            
+            # 完了通知はバッチ全体の書き込み後に行う
+            # （会話ごとに書くため、途中で通知すると最後のFutureだけを待つflush()が
+            #   別会話の未保存メッセージを残したまま戻ってしまう）
+            for _, _, future in batch:
+                future.set_result(None)
+    
+    async def _stop_flusher(self):
+        """書き込みタスクを停止"""
+        self._flusher_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._flusher_task
+    
+    def _run(self, coro):
+        """コルーチンを常駐ループで実行し、結果を同期的に返す"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+    
+    def close(self):
+        """未完了の保存を待ってから常駐イベントループ・書き込みスレッドを停止"""
+        self.flush()
+        if self._loop is not None:
+            self._run(self._stop_flusher())
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+            
+            # チャットセッション中に使い回したCosmos DBの接続プールを解放
+            cosmos_client = getattr(self.manager, "cosmos_client", None)
+            if cosmos_client is not None:
+                cosmos_client.close()
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
     
     def start_new_session(self, mode: str, title: str):
         """新セッション開始"""
         if self.is_cosmos:
-            import asyncio
-            import uuid
-            
             # 会話を作成
             conversation_title = f"{title} ({mode})"
             
-            # 非同期関数を同期実行
+            # 非同期関数を常駐ループで同期実行
             async def create_conv():
                 return await self.manager.create_conversation(
                     title=conversation_title,
@@ -59,109 +180,222 @@ class HistoryManagerWrapper:
                 )
             
             try:
-                conversation = asyncio.run(create_conv())
+                conversation = self._run(create_conv())
                 session_id = str(uuid.uuid4())
-                self.session_mapping[session_id] = conversation.conversation_id
+                self.session_mapping[session_id] = conversation
+                
+                # 新規会話は空であることが分かっているため、キャッシュを初期状態で用意する
+                now = time.monotonic()
+                self._info_cache[session_id] = (now, {
+                    'title': conversation.title,
+                    'message_count': 0
+                })
+                self._tail_cache[session_id] = (now, deque(maxlen=self.HISTORY_TAIL))
                 return session_id
             except Exception as e:
                 print(f"⚠️ Cosmos DB会話作成エラー: {e}")
                 return None
         else:
+            self.flush()  # セッション一覧ファイルへの書き込みが重ならないよう保存完了を待つ
             return self.manager.start_new_session(mode, title)
     
     def add_message(self, session_id: str, role: str, content: str, metadata=None):
-        """メッセージ追加"""
-        if self.is_cosmos:
-            import asyncio
-            
-            # セッションIDから会話IDを取得
-            conversation_id = self.session_mapping.get(session_id)
-            if not conversation_id:
-                print(f"⚠️ セッションID {session_id} が見つかりません")
-                return
-            
-            # 非同期関数を同期実行
-            async def add_msg():
-                if role == "user":
-                    return await self.manager.add_message(
-                        conversation_id=conversation_id,
-                        sender_user_id="chatbot_user",
-                        sender_display_name="ユーザー",
-                        content=content
-                    )
-                else:  # assistant
-                    return await self.manager.add_message(
-                        conversation_id=conversation_id,
-                        sender_user_id="assistant",
-                        sender_display_name="o3-pro",
-                        content=content
-                    )
-            
-            try:
-                asyncio.run(add_msg())
-            except Exception as e:
-                print(f"⚠️ Cosmos DBメッセージ追加エラー: {e}")
-        else:
-            self.manager.add_message(session_id, role, content, metadata)
+        """メッセージ追加（保存完了まで待つ）"""
+        future = self.add_message_async(session_id, role, content, metadata)
+        if future is not None:
+            future.result()
+    
+    def add_message_async(self, session_id: str, role: str, content: str, metadata=None):
+        """
+        メッセージ追加を開始し、保存完了を待たずに返す
+        
+        Cosmos DBの場合は保存キューに積み、完了待ち用のFutureを返す
+        （モデル呼び出しや次の入力待ちとDB書き込みを重ね、同じターンの書き込みは1回にまとめる）。
+        ローカル履歴の場合は書き込みスレッドに保存を投入し、同様にFutureを返す。
+        """
+        if not self.is_cosmos:
+            self._last_write = self._writer.submit(
+                self.manager.add_message, session_id, role, content, metadata
+            )
+            self._last_write.add_done_callback(self._report_write_error)
+            return self._last_write
+        
+        # セッションIDから会話IDを取得
+        conversation = self.session_mapping.get(session_id)
+        if not conversation:
+            print(f"⚠️ セッションID {session_id} が見つかりません")
+            return None
+        
+        if role == "user":
+            message = {
+                "sender_user_id": "chatbot_user",
+                "sender_display_name": "ユーザー",
+                "content": content
+            }
+        else:  # assistant
+            message = {
+                "sender_user_id": "assistant",
+                "sender_display_name": "o3-pro",
+                "content": content
+            }
+        
+        # キャッシュ済みのセッションは手元で更新（保存完了を待たずに参照へ反映）
+        if session_id in self._info_cache:
+            self._info_cache[session_id][1]['message_count'] += 1
+        if session_id in self._tail_cache:
+            self._tail_cache[session_id][1].append({
+                'role': role,
+                'content': content,
+                'snippet': _history_snippet(content),  # 表示用の整形は書き込み時に1回だけ
+                'timestamp': datetime.now().isoformat()
+            })
+        
+        # キューに積むだけで戻り、書き込みは常駐ループの_flusherがまとめて行う
+        future = Future()
+        self._loop.call_soon_threadsafe(
+            self._pending.put_nowait, (conversation, message, future)
+        )
+        self._last_write = future
+        return future
+    
+    @staticmethod
+    def _report_write_error(future):
+        """書き込みスレッドでの保存失敗を失敗した時点で表示する"""
+        if not future.cancelled() and future.exception() is not None:
+            print(f"⚠️ ローカル履歴保存エラー: {future.exception()}")
+    
+    def flush(self):
+        """
+        投入済みのメッセージ保存がすべて完了するまで待つ
+        
+        保存は投入順に処理され、完了はバッチ単位で通知されるため、
+        最後に投入したFutureの完了を待てばそれ以前の保存もすべて完了している。
+        保存失敗は完了時に表示済みのため、ここでは例外を再送出しない
+        （無関係なコマンドの実行中に過去の保存エラーが発生しないように）。
+        """
+        if self._last_write is not None:
+            wait([self._last_write])
+            self._last_write = None
+    
+    def _get_cached(self, cache: dict, session_id: str):
+        """有効期限内のキャッシュ値を返す（無い・期限切れはNone）"""
+        entry = cache.get(session_id)
+        if entry is None:
+            return None
+        fetched_at, value = entry
+        if time.monotonic() - fetched_at > self.CACHE_TTL:
+            del cache[session_id]
+            return None
+        return value
     
     def get_session_info(self, session_id: str):
         """セッション情報取得"""
         if self.is_cosmos:
-            import asyncio
-            
-            conversation_id = self.session_mapping.get(session_id)
-            if not conversation_id:
+            conversation = self.session_mapping.get(session_id)
+            if not conversation:
                 return None
+            conversation_id = conversation.conversation_id
+            
+            cached = self._get_cached(self._info_cache, session_id)
+            if cached is not None:
+                return dict(cached)
+            
+            self.flush()  # 保存中のメッセージを反映してから取得
             
             async def get_conv():
                 return await self.manager.get_conversation(conversation_id)
             
             try:
-                conversation = asyncio.run(get_conv())
+                conversation = self._run(get_conv())
                 if conversation:
-                    return {
+                    info = {
                         'title': conversation.title,
-                        'message_count': len(conversation.participants)  # 簡易表示
+                        'message_count': conversation.metrics.message_count
                     }
+                    self._info_cache[session_id] = (time.monotonic(), info)
+                    return dict(info)
             except Exception as e:
                 print(f"⚠️ Cosmos DB会話情報取得エラー: {e}")
             return None
         else:
+            self.flush()  # 保存中のメッセージを反映してから取得
             return self.manager.get_session_info(session_id)
     
+    @staticmethod
+    def _convert_messages(messages):
+        """Cosmos DBのメッセージをローカル形式に変換"""
+        return [
+            {
+                'role': 'user' if msg.sender.user_id == 'chatbot_user' else 'assistant',
+                'content': msg.content.text or msg.content.display_text,
+                'timestamp': msg.timestamp
+            }
+            for msg in messages
+        ]
+    
     def get_session_messages(self, session_id: str):
         """セッションメッセージ取得"""
         if self.is_cosmos:
-            import asyncio
-            
-            conversation_id = self.session_mapping.get(session_id)
-            if not conversation_id:
+            conversation = self.session_mapping.get(session_id)
+            if not conversation:
                 return []
+            conversation_id = conversation.conversation_id
+            
+            self.flush()  # 保存中のメッセージを反映してから取得
             
             async def get_msgs():
                 return await self.manager.get_conversation_messages(conversation_id)
             
             try:
-                messages = asyncio.run(get_msgs())
-                # ローカル形式に変換
-                converted = []
-                for msg in messages:
-                    converted.append({
-                        'role': 'user' if msg.sender.user_id == 'chatbot_user' else 'assistant',
-                        'content': msg.content.text or msg.content.display_text,
-                        'timestamp': msg.timestamp
-                    })
-                return converted
+                return self._convert_messages(self._run(get_msgs()))
             except Exception as e:
                 print(f"⚠️ Cosmos DBメッセージ取得エラー: {e}")
             return []
         else:
+            self.flush()  # 保存中のメッセージを反映してから取得
             return self.manager.get_session_messages(session_id)
+    
+    def get_recent_messages(self, session_id: str):
+        """最新HISTORY_TAIL件のメッセージ取得（古い順、表示用の'snippet'付き）"""
+        if self.is_cosmos:
+            conversation = self.session_mapping.get(session_id)
+            if not conversation:
+                return []
+            conversation_id = conversation.conversation_id
+            
+            cached = self._get_cached(self._tail_cache, session_id)
+            if cached is not None:
+                return list(cached)
+            
+            self.flush()  # 保存中のメッセージを反映してから取得
+            
+            async def get_recent():
+                return await self.manager.get_recent_messages(conversation_id, count=self.HISTORY_TAIL)
+            
+            try:
+                tail = deque(
+                    (dict(msg, snippet=_history_snippet(msg['content']))
+                     for msg in self._convert_messages(self._run(get_recent()))),
+                    maxlen=self.HISTORY_TAIL
+                )
+                self._tail_cache[session_id] = (time.monotonic(), tail)
+                return list(tail)
+            except Exception as e:
+                print(f"⚠️ Cosmos DBメッセージ取得エラー: {e}")
+            return []
+        else:
+            self.flush()  # 保存中のメッセージを反映してから取得
+            return [
+                dict(msg, snippet=_history_snippet(msg['content']))
+                for msg in self.manager.get_session_messages(session_id)[-self.HISTORY_TAIL:]
+            ]
 
 
 class SimpleO3ProChatBot:
     """シンプルo3-proチャットボット"""
     
+    JOB_STATUS_TTL = 1.0  # ジョブステータスのキャッシュ有効期間（秒）
+    
     def __init__(self):
         self.config = None
         self.client = None
@@ -172,6 +406,67 @@ class SimpleO3ProChatBot:
         self.current_session_id = None
         self.current_mode = "reasoning"
         self.current_effort = "low"
+        self._loop = None  # 非同期ストリーミング用の常駐イベントループ（初回使用時に起動）
+        self._job_status_cache = {}  # job_id -> (取得時刻, ステータス辞書)
+    
+    def _run_async(self, coro):
+        """
+        コルーチンを常駐ループで実行し、結果を同期的に返す
+        
+        共有の非同期クライアント（接続プール）を同じループで使い続けるため、
+        呼び出しごとにループを作り直さない。
+        """
+        if self._loop is None:
+            self._loop = _start_loop_thread()
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result()
+        except KeyboardInterrupt:
+            future.cancel()  # Ctrl+Cで受信中の応答を打ち切る
+            raise
+    
+    def close(self):
+        """履歴の保存完了を待ち、常駐イベントループを停止"""
+        if self.history_manager:
+            self.history_manager.close()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+    
+    async def _stream_response(self, user_input: str) -> dict:
+        """
+        応答を非同期ストリーミングで受信しながら表示
+        
+        受信待ちでループをブロックしないため、同じループ上の他の処理と並行できる。
+        表示は64文字または50ミリ秒ごとにまとめて書き出す。
+        """
+        start_time = time.perf_counter()
+        parts = []
+        
+        try:
+            async for chunk_text in self.streaming_handler.stream_iter(
+                user_input,
+                effort=self.current_effort,
+                min_chunk_chars=64
+            ):
+                parts.append(chunk_text)
+                sys.stdout.write(chunk_text)
+                sys.stdout.flush()
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"ストリーミング失敗: {e}",
+                "effort": self.current_effort,
+                "question": user_input
+            }
+        
+        return {
+            "success": True,
+            "response": "".join(parts),
+            "duration": time.perf_counter() - start_time,
+            "effort": self.current_effort,
+            "question": user_input
+        }
     
     def initialize(self) -> bool:
         """システム初期化"""
@@ -217,8 +512,8 @@ class SimpleO3ProChatBot:
     def process_message(self, user_input: str) -> dict:
         """メッセージ処理"""
         try:
-            # ユーザーメッセージを履歴に保存
-            self.history_manager.add_message(
+            # ユーザーメッセージを履歴に保存（Cosmos DBでは完了を待たずモデル呼び出しと並行させる）
+            self.history_manager.add_message_async(
                 self.current_session_id, 
                 "user", 
                 user_input
@@ -233,15 +528,10 @@ class SimpleO3ProChatBot:
             elif self.current_mode == "streaming":
                 print("🤖 ", end='', flush=True)  # ストリーミング開始時のアイコン
                 
-                def stream_callback(chunk_text):
-                    print(chunk_text, end='', flush=True)
-                
-                result = self.streaming_handler.stream_with_callback(
-                    user_input,
-                    stream_callback,
-                    effort=self.current_effort
-                )
-                print()  # ストリーミング終了後の改行
+                try:
+                    result = self._run_async(self._stream_response(user_input))
+                finally:
+                    print()  # ストリーミング終了後の改行
             elif self.current_mode == "background":
                 print("🔄 バックグラウンド処理を開始...")
                 result = self.background_handler.start_background_task(
@@ -266,7 +556,8 @@ class SimpleO3ProChatBot:
                     "duration": result.get("duration", 0)
                 }
                 
-                self.history_manager.add_message(
+                # 保存完了は待たずに次の入力へ進む（後続の保存・履歴参照・終了時に完了を待つ）
+                self.history_manager.add_message_async(
                     self.current_session_id,
                     "assistant", 
                     result["response"],
@@ -283,19 +574,17 @@ class SimpleO3ProChatBot:
     
     def set_mode(self, mode: str, effort: str = "low") -> bool:
         """モード変更"""
-        valid_modes = ["reasoning", "streaming", "background"]
-        valid_efforts = ["low", "medium", "high"]
-        
-        if mode not in valid_modes:
-            print(f"❌ 無効なモード: {mode}. 有効: {valid_modes}")
+        if mode not in VALID_MODES:
+            print(f"❌ 無効なモード: {mode}. 有効: {VALID_MODES}")
             return False
         
-        if effort not in valid_efforts:
-            print(f"❌ 無効なeffort: {effort}. 有効: {valid_efforts}")
+        if effort not in VALID_EFFORTS:
+            print(f"❌ 無効なeffort: {effort}. 有効: {VALID_EFFORTS}")
             return False
         
-        self.current_mode = mode
-        self.current_effort = effort
+        # 入力から切り出した文字列はintern化し、以降の比較・メタデータ辞書で同一オブジェクトを使う
+        self.current_mode = sys.intern(mode)
+        self.current_effort = sys.intern(effort)
         
         print(f"✅ モード変更: {mode} (effort: {effort})")
         return True
@@ -303,13 +592,16 @@ class SimpleO3ProChatBot:
     def _initialize_history_manager(self):
         """履歴管理初期化（Cosmos DB優先、フォールバック対応）"""
         # Cosmos DB環境変数チェック
-        import os
         cosmos_endpoint = os.getenv("COSMOS_DB_ENDPOINT")
         
-        if COSMOS_AVAILABLE and cosmos_endpoint:
+        if cosmos_endpoint:
             try:
                 print("🔍 Cosmos DB履歴管理を初期化中...")
-                from dotenv import load_dotenv
+                
+                # Cosmos DB SDKは読み込みが重いため、使用する場合のみここでimportする
+                from cosmos_history.config import load_config_from_env
+                from cosmos_history.cosmos_client import CosmosDBClient
+                from cosmos_history.cosmos_history_manager import CosmosHistoryManager
                 
                 # .env.cosmosファイルを読み込み
                 if Path(".env.cosmos").exists():
@@ -326,6 +618,9 @@ class SimpleO3ProChatBot:
                 print("✅ Cosmos DB履歴管理初期化完了")
                 return wrapper
                 
+            except ImportError as e:
+                print(f"⚠️ Cosmos DBモジュールが利用できません: {e}")
+                print("📂 ローカル履歴管理にフォールバック")
             except Exception as e:
                 print(f"⚠️ Cosmos DB初期化失敗: {e}")
                 print("📂 ローカル履歴管理にフォールバック")
@@ -391,22 +686,16 @@ class SimpleO3ProChatBot:
             print("セッションがありません")
             return
         
-        messages = self.history_manager.get_session_messages(self.current_session_id)
+        messages = self.history_manager.get_recent_messages(self.current_session_id)
         if not messages:
             print("メッセージがありません")
             return
         
-        print(f"\n=== セッション履歴 (最新5件) ===")
-        for msg in messages[-5:]:  # 最新5件のみ表示
+        print(f"\n=== セッション履歴 (最新{self.history_manager.HISTORY_TAIL}件) ===")
+        for msg in messages:
             role = "👤" if msg["role"] == "user" else "🤖"
-            content = msg["content"]
-            # 確実に文字制限を適用
-            content = content.replace('\n', ' ')  # 改行を除去
-            if len(content) > 60:
-                content = content[:60] + "..."
-            
             timestamp = msg["timestamp"][:19]
-            print(f"{role} [{timestamp}] {content}")
+            print(f"{role} [{timestamp}] {msg['snippet']}")
         print()
     
     def start_new_session(self, title: str = ""):
@@ -437,6 +726,22 @@ class SimpleO3ProChatBot:
             print(f"   質問: {job['question'][:60]}...")
         print()
     
+    def _check_job_status(self, job_id: str) -> dict:
+        """
+        ジョブステータスを取得（JOB_STATUS_TTL秒以内の再確認はキャッシュを返す）
+        
+        /job status を続けて入力した場合のAPI往復を減らす。
+        失敗結果はキャッシュせず、次回に再取得する。
+        """
+        cached = self._job_status_cache.get(job_id)
+        if cached is not None and time.monotonic() - cached[0] < self.JOB_STATUS_TTL:
+            return cached[1]
+        
+        status = self.background_handler.check_status(job_id)
+        if status["success"]:
+            self._job_status_cache[job_id] = (time.monotonic(), status)
+        return status
+    
     def show_job_status(self, job_id: str):
         """ジョブステータス表示"""
         if not self.background_handler:
@@ -444,7 +749,7 @@ class SimpleO3ProChatBot:
             return
         
         print(f"🔍 ジョブステータス確認中: {job_id}")
-        status = self.background_handler.check_status(job_id)
+        status = self._check_job_status(job_id)
         
         if status["success"]:
             print(f"📊 ステータス: {status['status']}")
@@ -461,6 +766,14 @@ class SimpleO3ProChatBot:
             return
         
         print(f"📥 ジョブ結果取得中: {job_id}")
+        
+        # 直前に未完了と分かっているジョブはAPIを呼ばずに返す
+        cached = self._job_status_cache.get(job_id)
+        if (cached is not None and time.monotonic() - cached[0] < self.JOB_STATUS_TTL
+                and cached[1]["status"] != "completed"):
+            print(f"❌ エラー: ジョブがまだ完了していません（現在のステータス: {cached[1]['status']}）")
+            return
+        
         result = self.background_handler.get_result(job_id)
         
         if result["success"]:
@@ -476,12 +789,12 @@ class SimpleO3ProChatBot:
                     "job_id": job_id
                 }
                 
-                self.history_manager.add_message(
+                self.history_manager.add_message_async(
                     self.current_session_id,
                     "user", 
                     result["question"]
                 )
-                self.history_manager.add_message(
+                self.history_manager.add_message_async(
                     self.current_session_id,
                     "assistant", 
                     result["response"],
@@ -498,6 +811,7 @@ class SimpleO3ProChatBot:
         
         print(f"🚫 ジョブキャンセル中: {job_id}")
         result = self.background_handler.cancel_job(job_id)
+        self._job_status_cache.pop(job_id, None)
         
         if result["success"]:
             print(f"✅ {result['message']}")
@@ -505,6 +819,53 @@ class SimpleO3ProChatBot:
             print(f"❌ エラー: {result['error']}")
 
 
+def _handle_new(chatbot, args):
+    """/new [タイトル]（タイトル内の空白はそのまま保持）"""
+    chatbot.start_new_session(args)
+
+
+def _handle_mode(chatbot, args):
+    """/mode <reasoning|streaming|background> [effort]"""
+    parts = args.split()
+    if parts:
+        mode = parts[0]
+        effort = parts[1] if len(parts) >= 2 else "low"
+        chatbot.set_mode(mode, effort)
+    else:
+        print("使用方法: /mode <reasoning|streaming|background> [effort]")
+
+
+# /job のサブコマンド（job_idを取るもの）
+_JOB_COMMANDS = {
+    'status': SimpleO3ProChatBot.show_job_status,
+    'result': SimpleO3ProChatBot.get_job_result,
+    'cancel': SimpleO3ProChatBot.cancel_job,
+}
+
+
+def _handle_job(chatbot, args):
+    """/job <list|status|result|cancel> [job_id]"""
+    sub_command, _, job_id = args.partition(' ')
+    job_id = job_id.strip()
+    if sub_command == 'list':
+        chatbot.show_jobs()
+    elif sub_command in _JOB_COMMANDS and job_id:
+        _JOB_COMMANDS[sub_command](chatbot, job_id)
+    else:
+        print("使用方法: /job <list|status|result|cancel> [job_id]")
+
+
+# コマンド名 → 処理関数（chatbot, コマンド名以降の引数文字列）の対応表（/quit, /exit はmainで処理）
+COMMANDS = {
+    'help': lambda chatbot, args: chatbot.show_help(),
+    'status': lambda chatbot, args: chatbot.show_status(),
+    'history': lambda chatbot, args: chatbot.show_history(),
+    'new': _handle_new,
+    'mode': _handle_mode,
+    'job': _handle_job,
+}
+
+
 def main():
     """メイン関数"""
     chatbot = SimpleO3ProChatBot()
@@ -532,48 +893,18 @@ def main():
             
             # コマンド処理
             if user_input.startswith('/'):
-                parts = user_input[1:].split()
-                command = parts[0].lower()
+                command, _, args = user_input[1:].partition(' ')
+                command = command.lower()
                 
                 if command in ['quit', 'exit']:
                     print("👋 終了します")
                     break
-                elif command == 'help':
-                    chatbot.show_help()
-                elif command == 'status':
-                    chatbot.show_status()
-                elif command == 'history':
-                    chatbot.show_history()
-                elif command == 'new':
-                    title = ' '.join(parts[1:]) if len(parts) > 1 else ""
-                    chatbot.start_new_session(title)
-                elif command == 'mode':
-                    if len(parts) >= 2:
-                        mode = parts[1]
-                        effort = parts[2] if len(parts) >= 3 else "low"
-                        chatbot.set_mode(mode, effort)
-                    else:
-                        print("使用方法: /mode <reasoning|streaming|background> [effort]")
-                elif command == 'job':
-                    if len(parts) >= 2:
-                        sub_command = parts[1]
-                        if sub_command == 'list':
-                            chatbot.show_jobs()
-                        elif sub_command == 'status' and len(parts) >= 3:
-                            job_id = parts[2]
-                            chatbot.show_job_status(job_id)
-                        elif sub_command == 'result' and len(parts) >= 3:
-                            job_id = parts[2]
-                            chatbot.get_job_result(job_id)
-                        elif sub_command == 'cancel' and len(parts) >= 3:
-                            job_id = parts[2]
-                            chatbot.cancel_job(job_id)
-                        else:
-                            print("使用方法: /job <list|status|result|cancel> [job_id]")
-                    else:
-                        print("使用方法: /job <list|status|result|cancel> [job_id]")
-                else:
+                
+                handler = COMMANDS.get(command)
+                if handler is None:
                     print(f"未知のコマンド: {command}. /help で確認してください")
+                else:
+                    handler(chatbot, args.strip())
                 
                 continue
             
@@ -602,6 +933,8 @@ def main():
         except Exception as e:
             print(f"\n❌ エラー: {e}")
             continue
+    
+    chatbot.close()
 
 
 if __name__ == "__main__":
@@ -7,28 +7,139 @@ Azure AD認証を使用してo3-proに接続し、基本機能をテスト
 
 import sys
 import os
+import re
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import pytest
+
 # プロジェクトルートをパスに追加
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 try:
-    from core.azure_universal_auth import AzureAuthManager, quick_auth
-    from core.azure_auth import O3ProConfig, O3ProClient
+    from core.azure_universal_auth import AzureAuthManager, quick_auth, AZURE_IDENTITY_AVAILABLE
+    from core.azure_auth import O3ProConfig, O3ProClient, _get_shared_http_client
     import openai
 except ImportError as e:
-    print(f"❌ インポートエラー: {e}")
-    sys.exit(1)
+    if __name__ == "__main__":
+        print(f"❌ インポートエラー: {e}")
+        sys.exit(1)
+    # pytest収集時は依存パッケージ（openai, dotenv, azure-identity等）がなければモジュールごとスキップ
+    pytest.skip(f"依存パッケージが不足しています: {e}", allow_module_level=True)
+
+
+# (表示名, テストメソッド名)。スクリプト実行とpytest実行の両方で使う
+INTEGRATION_TESTS = [
+    # 基本認証テスト
+    ("Azure AD認証トークン取得", "test_azure_ad_token_acquisition"),
+    ("OpenAIクライアント統合", "test_openai_client_with_azure_ad"),
+    # o3-pro機能テスト
+    ("o3-pro推論テスト", "test_o3_pro_reasoning_with_azure_ad"),
+    # 高度な機能テスト
+    ("トークンリフレッシュ", "test_token_refresh_capability"),
+    ("複数サービス認証", "test_multiple_service_authentication"),
+    # フォールバック機能テスト
+    ("APIキーフォールバック", "test_fallback_to_api_key"),
+]
+
+# o3-pro推論テストの確認項目 (質問, 期待する答え)
+# 1回のリクエストに番号付きでまとめて送るため、項目を増やしてもAPI呼び出しは1回のまま
+SMOKE_PROMPTS = [
+    ("1+1は何ですか？", 2),
+    ("2+2は何ですか？", 4),
+]
+
+# 番号付き回答の1行（例: "1. 2です", "**2)** 2+2=4"）→ (番号, 回答部分)
+_NUMBERED_LINE = re.compile(r"^\W*(\d+)\s*[.)．、:：]\W*(.*)$")
+_NUMBER = re.compile(r"\d+")
+
+
+def _numbered_answers(text: str) -> dict:
+    """
+    番号付きの回答を {番号: 回答の最後の数値} に分解する
+    
+    リストの番号自体を答えと取り違えないよう、行ごとに番号を外してから
+    回答部分の最後の数値（"1+1=2" の 2）を答えとして扱う。
+    """
+    answers = {}
+    for line in text.splitlines():
+        match = _NUMBERED_LINE.match(line)
+        if not match:
+            continue
+        numbers = _NUMBER.findall(match.group(2))
+        if numbers:
+            answers.setdefault(int(match.group(1)), int(numbers[-1]))
+    return answers
+
+
+@functools.cache
+def _shared_config() -> O3ProConfig:
+    """プロセス内で共有するO3ProConfig（テスト収集・各テスト・mainで同じ設定を使う）"""
+    return O3ProConfig()
 
 
 class AzureO3ProIntegrationTester:
     """Azure AD認証 + o3-pro統合テスター"""
     
-    def __init__(self):
+    def __init__(self, auth_manager=None, config: O3ProConfig = None):
+        """
+        Args:
+            auth_manager: 全テストで共有するAzureAuthManager（省略時は初回使用時に生成）
+            config: 全テストで共有するO3ProConfig（省略時はプロセス共有の設定）
+        """
+        self.config = config or _shared_config()
         self.passed = 0
         self.failed = 0
         self.results = []
+        self._auth_manager = auth_manager
+        self._quick_auth_result = None
+        self._openai_client = None
+    
+    @property
+    def auth_manager(self) -> AzureAuthManager:
+        """共有の認証マネージャー（プロバイダー初期化とCLI呼び出しをテスト間で1回にする）"""
+        if self._auth_manager is None:
+            self._auth_manager = AzureAuthManager()
+        return self._auth_manager
+    
+    def _quick_auth(self):
+        """quick_auth("cognitive_services") の結果（初回のみ実行し、以降は再利用）"""
+        if self._quick_auth_result is None:
+            self._quick_auth_result = quick_auth("cognitive_services")
+        return self._quick_auth_result
+    
+    def _auth_once(self, service: str):
+        """
+        認証とトークン取得をまとめて行う
+        
+        Returns:
+            (AuthResult, トークン文字列) ※認証時に取得したトークンを使い、再取得しない
+        """
+        result = self.auth_manager.authenticate(service)
+        if not result.success:
+            return result, None
+        if result.token is not None:
+            return result, result.token.token
+        return result, self.auth_manager.get_token(service)
+    
+    def _get_openai_client(self, config: O3ProConfig):
+        """
+        テスト間で共有するAzureOpenAIクライアント（初回のみ生成）
+        
+        共有httpxクライアントの接続プールを使い、トークンは認証マネージャーの
+        キャッシュから取得する（期限切れ間近の場合のみ再取得）。
+        """
+        if self._openai_client is None:
+            auth_manager = self.auth_manager
+            self._openai_client = openai.AzureOpenAI(
+                azure_endpoint=config.endpoint,
+                api_version=config.api_version,
+                azure_ad_token_provider=lambda: auth_manager.get_token("cognitive_services"),
+                http_client=_get_shared_http_client()
+            )
+        return self._openai_client
     
     def run_test(self, test_name: str, test_func):
         """テスト実行"""
@@ -53,9 +164,8 @@ class AzureO3ProIntegrationTester:
     def test_azure_ad_token_acquisition(self) -> bool:
         """Azure AD認証でCognitive Services用トークン取得テスト"""
         
-        # Azure認証マネージャーで認証
-        auth_manager = AzureAuthManager()
-        result = auth_manager.authenticate("cognitive_services")
+        # Azure認証マネージャーで認証・Cognitive Services用トークン取得
+        result, token = self._auth_once("cognitive_services")
         
         if not result.success:
             print(f"   認証失敗: {result.error}")
@@ -63,9 +173,6 @@ class AzureO3ProIntegrationTester:
         
         print(f"   認証方式: {result.method}")
         
-        # Cognitive Services用トークン取得
-        token = auth_manager.get_token("cognitive_services")
-        
         if not token:
             print("   トークン取得失敗")
             return False
@@ -76,15 +183,14 @@ class AzureO3ProIntegrationTester:
     def test_openai_client_with_azure_ad(self) -> bool:
         """Azure AD認証を使用したOpenAIクライアント接続テスト"""
         
-        # 設定読み込み
-        config = O3ProConfig()
+        config = self.config
         
         if not config.endpoint:
             print("   Azure OpenAI エンドポイントが設定されていません")
             return False
         
         # Azure AD認証でトークン取得
-        success, credential, message = quick_auth("cognitive_services")
+        success, credential, message = self._quick_auth()
         
         if not success:
             print(f"   認証失敗: {message}")
@@ -92,21 +198,16 @@ class AzureO3ProIntegrationTester:
         
         print(f"   認証成功: {message}")
         
-        # Azure AD認証でOpenAIクライアント作成
-        scope = "https://cognitiveservices.azure.com/.default"
-        token = credential.get_token(scope)
+        # Cognitive Services用トークン取得（認証マネージャーのキャッシュ経由）
+        token = self.auth_manager.get_token("cognitive_services")
         
         if not token:
             print("   トークン取得失敗")
             return False
         
         try:
-            # OpenAIクライアント作成（トークンベース認証）
-            client = openai.AzureOpenAI(
-                azure_endpoint=config.endpoint,
-                api_version=config.api_version,
-                azure_ad_token=token.token
-            )
+            # OpenAIクライアント作成（トークンプロバイダー認証）
+            self._get_openai_client(config)
             
             print(f"   OpenAIクライアント作成成功")
             return True
@@ -118,48 +219,56 @@ class AzureO3ProIntegrationTester:
     def test_o3_pro_reasoning_with_azure_ad(self) -> bool:
         """Azure AD認証を使用したo3-pro基本推論テスト"""
         
-        # 設定読み込み
-        config = O3ProConfig()
+        config = self.config
         
         if not all([config.endpoint, config.deployment]):
             print("   Azure OpenAI設定が不完全です")
             return False
         
         # Azure AD認証でトークン取得
-        success, credential, message = quick_auth("cognitive_services")
+        success, credential, message = self._quick_auth()
         
         if not success:
             print(f"   認証失敗: {message}")
             return False
         
         try:
-            # Azure AD認証でOpenAIクライアント作成
-            scope = "https://cognitiveservices.azure.com/.default"
-            token = credential.get_token(scope)
-            
-            client = openai.AzureOpenAI(
-                azure_endpoint=config.endpoint,
-                api_version=config.api_version,
-                azure_ad_token=token.token
-            )
+            # Azure AD認証のOpenAIクライアント（前のテストで生成済みなら接続ごと再利用）
+            client = self._get_openai_client(config)
             
             print(f"   OpenAIクライアント作成成功")
             
             # o3-pro推論テスト
             print(f"   o3-pro推論テスト実行中...")
             
+            questions = "\n".join(
+                f"{i}. {question}" for i, (question, _) in enumerate(SMOKE_PROMPTS, 1)
+            )
             response = client.responses.create(
                 model=config.deployment,
-                input="1+1は何ですか？簡潔に答えてください。",
+                input=f"次の質問に番号付きで簡潔に答えてください。\n{questions}",
                 reasoning={"effort": "low"}
             )
             
-            if hasattr(response, 'output_text') and response.output_text:
-                print(f"   推論結果: {response.output_text[:50]}...")
-                return True
-            else:
+            output_text = getattr(response, 'output_text', None)
+            if not output_text:
                 print("   推論結果が取得できませんでした")
                 return False
+            
+            print(f"   推論結果: {output_text[:50]}...")
+            
+            # 各質問の回答を、その番号の行の答えとだけ照合する
+            answers = _numbered_answers(output_text)
+            wrong = [
+                (i, expected, answers.get(i))
+                for i, (_, expected) in enumerate(SMOKE_PROMPTS, 1)
+                if answers.get(i) != expected
+            ]
+            if wrong:
+                print(f"   期待と異なる回答 (番号, 期待値, 回答): {wrong}")
+                return False
+            
+            return True
         
         except Exception as e:
             print(f"   o3-pro推論テスト失敗: {e}")
@@ -170,15 +279,14 @@ class AzureO3ProIntegrationTester:
         
         try:
             # 複数回のトークン取得で自動リフレッシュをテスト
-            auth_manager = AzureAuthManager()
+            auth_manager = self.auth_manager
             
             # 初回認証
-            result1 = auth_manager.authenticate("cognitive_services")
+            result1, token1 = self._auth_once("cognitive_services")
             if not result1.success:
                 print(f"   初回認証失敗: {result1.error}")
                 return False
             
-            token1 = auth_manager.get_token("cognitive_services")
             print(f"   初回トークン: {token1[:20] if token1 else 'None'}...")
             
             # 再度トークン取得（キャッシュまたはリフレッシュ）
@@ -194,28 +302,33 @@ class AzureO3ProIntegrationTester:
     def test_multiple_service_authentication(self) -> bool:
         """複数Azureサービス認証テスト"""
         
-        auth_manager = AzureAuthManager()
+        # 共有マネージャーはスレッド起動前に生成しておく（並行実行時の重複生成を防ぐ）
+        self.auth_manager
         
         # テスト対象サービス
         services = ["cognitive_services", "storage", "keyvault"]
         
-        success_count = 0
-        
-        for service in services:
+        def authenticate_service(service: str):
+            """1サービスの認証・トークン取得（成否と表示用メッセージを返す）"""
             try:
-                result = auth_manager.authenticate(service)
-                if result.success:
-                    token = auth_manager.get_token(service)
-                    if token:
-                        print(f"   {service}: 認証・トークン取得成功")
-                        success_count += 1
-                    else:
-                        print(f"   {service}: 認証成功、トークン取得失敗")
-                else:
-                    print(f"   {service}: 認証失敗 - {result.error}")
-            
+                result, token = self._auth_once(service)
+                if not result.success:
+                    return False, f"認証失敗 - {result.error}"
+                if token:
+                    return True, "認証・トークン取得成功"
+                return False, "認証成功、トークン取得失敗"
             except Exception as e:
-                print(f"   {service}: 例外 - {e}")
+                return False, f"例外 - {e}"
+        
+        # サービスごとの認証は互いに独立しているため並行実行（出力はサービス順）
+        with ThreadPoolExecutor(max_workers=len(services)) as executor:
+            results = list(executor.map(authenticate_service, services))
+        
+        success_count = 0
+        for service, (success, message) in zip(services, results):
+            print(f"   {service}: {message}")
+            if success:
+                success_count += 1
         
         print(f"   成功サービス: {success_count}/{len(services)}")
         return success_count >= 1  # 最低1つのサービスで成功
@@ -225,7 +338,7 @@ class AzureO3ProIntegrationTester:
         
         try:
             # 既存のO3ProClientでフォールバック動作を確認
-            config = O3ProConfig()
+            config = self.config
             
             # APIキー設定の確認
             if not config.api_key:
@@ -250,19 +363,8 @@ class AzureO3ProIntegrationTester:
         """全統合テスト実行"""
         print("=== Azure AD認証 + o3-pro統合テスト開始 ===")
         
-        # 基本認証テスト
-        self.run_test("Azure AD認証トークン取得", self.test_azure_ad_token_acquisition)
-        self.run_test("OpenAIクライアント統合", self.test_openai_client_with_azure_ad)
-        
-        # o3-pro機能テスト
-        self.run_test("o3-pro推論テスト", self.test_o3_pro_reasoning_with_azure_ad)
-        
-        # 高度な機能テスト
-        self.run_test("トークンリフレッシュ", self.test_token_refresh_capability)
-        self.run_test("複数サービス認証", self.test_multiple_service_authentication)
-        
-        # フォールバック機能テスト
-        self.run_test("APIキーフォールバック", self.test_fallback_to_api_key)
+        for test_name, method_name in INTEGRATION_TESTS:
+            self.run_test(test_name, getattr(self, method_name))
         
         # 結果表示
         print(f"\n=== 統合テスト結果 ===")
@@ -279,6 +381,42 @@ class AzureO3ProIntegrationTester:
         return self.failed == 0
 
 
+# pytestから実行する場合のエントリーポイント
+# 各テストは独立しているため、pytest-xdist（pytest -n auto）でワーカーに分散できる
+
+@pytest.fixture(scope="module")
+def integration_tester():
+    """モジュール（xdistではワーカー）内で共有するテスター"""
+    return AzureO3ProIntegrationTester()
+
+
+def _o3_pro_configured() -> bool:
+    """o3-proの接続設定（.env含む）があるか（収集時に判定するため認証は行わない）"""
+    config = _shared_config()
+    return bool(config.endpoint and config.deployment)
+
+
+# エンドポイントに接続するテスト（設定がない環境では認証処理ごとスキップ）
+_requires_o3_pro = pytest.mark.skipif(
+    not _o3_pro_configured(),
+    reason="o3-pro env not configured"
+)
+_O3_PRO_TESTS = {"test_openai_client_with_azure_ad", "test_o3_pro_reasoning_with_azure_ad"}
+
+
+@pytest.mark.skipif(not AZURE_IDENTITY_AVAILABLE, reason="azure-identity not installed")
+@pytest.mark.parametrize(
+    "method_name",
+    [
+        pytest.param(method_name, marks=_requires_o3_pro if method_name in _O3_PRO_TESTS else ())
+        for _, method_name in INTEGRATION_TESTS
+    ]
+)
+def test_integration(integration_tester, method_name):
+    """統合テストを1件ずつ実行"""
+    assert getattr(integration_tester, method_name)()
+
+
 def main():
     """メイン関数"""
     
@@ -286,7 +424,7 @@ def main():
     print("=== Azure AD + o3-pro統合テスト環境 ===")
     
     # 設定確認
-    config = O3ProConfig()
+    config = _shared_config()
     print(f"Azure OpenAI エンドポイント: {'設定済み' if config.endpoint else '未設定'}")
     print(f"デプロイメント名: {'設定済み' if config.deployment else '未設定'}")
     print(f"APIキー: {'設定済み' if config.api_key else '未設定'}")
@@ -304,8 +442,8 @@ def main():
         print(f"Azure認証システム確認失敗: {e}")
         return 1
     
-    # 統合テスト実行
-    tester = AzureO3ProIntegrationTester()
+    # 統合テスト実行（状態確認で生成した認証マネージャーを共有）
+    tester = AzureO3ProIntegrationTester(auth_manager, config)
     success = tester.run_all_tests()
     
     if success: